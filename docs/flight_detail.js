@@ -18,6 +18,19 @@ document.addEventListener('DOMContentLoaded', async () => {
   const supabaseKey = 'sb_publishable_PBY7Y_HM60Ijqw9j6iOGeg_XqLDI7SS';
   const client      = supabase.createClient(supabaseUrl, supabaseKey);
 
+  // Optional caching read API (read_api.py) — keep in sync with script.js.
+  // Empty → query Supabase directly.
+  const READ_API = '';
+
+  // GET a read API endpoint; the browser revalidates with the ETag (304)
+  async function apiGet(path, params) {
+    const url = new URL(`${READ_API}${path}`);
+    Object.entries(params).forEach(([key, value]) => url.searchParams.set(key, value));
+    const res = await fetch(url);
+    if (!res.ok) throw new Error(`Read API returned ${res.status}`);
+    return res.json();
+  }
+
   // ===== UTILS =====
 
   // Format a UTC timestamp string as PKT local time
@@ -65,6 +78,10 @@ document.addEventListener('DOMContentLoaded', async () => {
   const lastRefreshedEl   = document.getElementById('last-refreshed');
   const tbody             = document.querySelector('#snapshot-table tbody');
 
+  // Arrival/Departure of this flight — set from the first snapshot, used to
+  // look up when its board was last checked
+  let flightType = null;
+
   // ===== RENDER SNAPSHOTS =====
   function renderSnapshots(snapshots) {
     tbody.innerHTML = '';
@@ -87,18 +104,23 @@ document.addEventListener('DOMContentLoaded', async () => {
     });
   }
 
-  // ===== FETCH SCRAPER FRESHNESS =====
+  // ===== FETCH BOARD FRESHNESS =====
+  // When the scraper last checked this flight's (date, type) board
   async function fetchFreshness() {
+    if (!flightType) return;
     try {
-      const { data, error } = await client
-        .from('scraper_status')
-        .select('last_run')
-        .eq('id', 1)
-        .single();
+      const { data, error } = READ_API
+        ? { data: await apiGet('/freshness', { date, type: flightType }), error: null }
+        : await client
+            .from('board_status')
+            .select('last_checked')
+            .eq('scheduled_date', date)
+            .eq('type', flightType)
+            .maybeSingle();
 
       if (error || !data) return;
       if (lastRefreshedEl) {
-        lastRefreshedEl.textContent = `Last checked: ${timeAgo(data.last_run)}`;
+        lastRefreshedEl.textContent = `Last checked: ${timeAgo(data.last_checked)}`;
       }
     } catch (e) {
       // Freshness is non-critical — fail silently
@@ -108,12 +130,14 @@ document.addEventListener('DOMContentLoaded', async () => {
   // ===== FETCH SNAPSHOTS & RENDER =====
   async function fetchAndRender() {
     try {
-      const { data: snapshots, error } = await client
-        .from('flight_snapshots')
-        .select('*')
-        .eq('flight_number', flightNumber)
-        .eq('scheduled_date', date)
-        .order('scraped_at', { ascending: true });
+      const { data: snapshots, error } = READ_API
+        ? { data: await apiGet('/history', { flight: flightNumber, date }), error: null }
+        : await client
+            .from('flight_snapshots')
+            .select('*')
+            .eq('flight_number', flightNumber)
+            .eq('scheduled_date', date)
+            .order('scraped_at', { ascending: true });
 
       if (error) throw error;
 
@@ -123,6 +147,8 @@ document.addEventListener('DOMContentLoaded', async () => {
         return;
       }
 
+      flightType = snapshots[0].type;
+
       // Populate flight header from first snapshot (only on first load)
       if (flightInfoDiv.querySelector('#flight-number') === null) {
         const first = snapshots[0];
@@ -9,6 +9,10 @@ document.addEventListener('DOMContentLoaded', () => {
   const supabaseKey = 'sb_publishable_PBY7Y_HM60Ijqw9j6iOGeg_XqLDI7SS';
   const client = supabase.createClient(supabaseUrl, supabaseKey);
 
+  // Optional caching read API (read_api.py), e.g. 'https://api.example.com'.
+  // Empty → query Supabase directly.
+  const READ_API = '';
+
   const searchBtn       = document.getElementById('search-btn');
   const resultsDiv      = document.getElementById('search-results');
   const historyList     = document.getElementById('history-list');
@@ -46,12 +50,6 @@ document.addEventListener('DOMContentLoaded', () => {
   citySelect.addEventListener('change', () => searchBtn.click());
 
   // --- Utility ---
-  function timeToMinutes(t) {
-    if (!t) return 0;
-    const [h, m] = t.split(':').map(Number);
-    return h * 60 + m;
-  }
-
   // Normalise flight number input — strip spaces, hyphens, underscores, uppercase
   function normaliseQuery(input) {
     return input.replace(/[\s\-_]/g, '').toUpperCase();
@@ -69,6 +67,31 @@ document.addEventListener('DOMContentLoaded', () => {
     return `https://pics.avs.io/60/60/${code}.png`;
   }
 
+  // --- Data ---
+  // Board / search rows, sorted by st_at (ST parsed into a timestamp by the scraper)
+  async function fetchFlights(date, query, typeFilter, natureFilter) {
+    if (READ_API) {
+      const url = new URL(`${READ_API}/flights`);
+      url.searchParams.set('date', date);
+      if (query)        url.searchParams.set('q', query);
+      if (typeFilter)   url.searchParams.set('type', typeFilter);
+      if (natureFilter) url.searchParams.set('nature', natureFilter);
+      const res = await fetch(url);
+      if (!res.ok) throw new Error(`Read API returned ${res.status}`);
+      return res.json();
+    }
+
+    let queryBuilder = client.from('flights').select('*').eq('scheduled_date', date)
+      .order('st_at', { ascending: true, nullsFirst: false });
+    if (query)        queryBuilder = queryBuilder.ilike('flight_number', `%${query}%`);
+    if (typeFilter)   queryBuilder = queryBuilder.eq('type', typeFilter);
+    if (natureFilter) queryBuilder = queryBuilder.eq('nature', natureFilter);
+
+    const { data, error } = await queryBuilder;
+    if (error) throw error;
+    return data;
+  }
+
   // --- Search ---
   searchBtn.addEventListener('click', async () => {
     const raw          = document.getElementById('flight-search').value.trim();
@@ -88,13 +111,7 @@ document.addEventListener('DOMContentLoaded', () => {
     resultsDiv.innerHTML  = '<p>Loading...</p>';
 
     try {
-      let queryBuilder = client.from('flights').select('*').eq('scheduled_date', date);
-      if (query)        queryBuilder = queryBuilder.ilike('flight_number', `%${query}%`);
-      if (typeFilter)   queryBuilder = queryBuilder.eq('type', typeFilter);
-      if (natureFilter) queryBuilder = queryBuilder.eq('nature', natureFilter);
-
-      const { data: flights, error } = await queryBuilder;
-      if (error) throw error;
+      const flights = await fetchFlights(date, query, typeFilter, natureFilter);
 
       // Populate city filter above results and show it
       const cities = [...new Set(flights.map(f => f.city).filter(Boolean))].sort();
@@ -112,8 +129,6 @@ document.addEventListener('DOMContentLoaded', () => {
         return;
       }
 
-      filtered.sort((a, b) => timeToMinutes(a.st) - timeToMinutes(b.st));
-
       // Render results
       resultsDiv.innerHTML = '';
       filtered.forEach(f => {
@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+load_test.py — Read-path load test for the public site
+======================================================
+Replays the queries the static pages send to Postgres, at a configurable
+concurrency, while a scraper write cycle runs against the same tables.
+Reports p50 / p95 / p99 latency and throughput per query shape.
+
+Query shapes (keep in sync with the frontend):
+  docs/script.js        board by date, + type, + nature, flight number ilike search
+  docs/flight_detail.js snapshot history per flight, board "last checked"
+
+The write cycle is the real write path of both scrapers — scraper.py's
+process_board and origin_scraper.py's process_batch — fed with synthetic PAA
+boards for yesterday / today / tomorrow, with a share of statuses and times
+changing every cycle.
+
+Meant for a LOCAL throwaway Postgres only:
+  - --seed creates the base tables if missing, applies migrations/*.sql and
+    fills ~a month of synthetic boards through the same write path
+  - both --seed and the writer refuse non-local DB_HOST unless --allow-remote
+
+Usage:
+  DB_HOST=localhost DB_NAME=flights_test DB_USER=postgres python load_test.py --seed
+  python load_test.py --clients 20 --duration 60
+  python load_test.py --clients 50 --duration 30 --writer none
+"""
+
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+import datetime
+import threading
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+import scraper
+import origin_scraper
+
+
+# ==============================================================================
+#   CONFIG
+# ==============================================================================
+
+# Relative weight of each query shape in the replayed traffic.
+# A detail page visit issues both "history" and "freshness".
+QUERY_MIX = {
+    "board":        30,   # index page, date only
+    "board_type":   20,   # + Arrival/Departure
+    "board_nature": 10,   # + type + International/Domestic
+    "search":       15,   # flight number ilike
+    "history":      15,   # detail page snapshots
+    "freshness":    10,   # detail page "Last checked"
+}
+
+# Synthetic data shape
+SEED_DAYS_BACK      = 30
+FLIGHTS_PER_BOARD   = 150
+SEED_PASSES         = 3      # write passes per seeded board → snapshot history
+CHANGE_RATE         = 0.10   # share of flights that change per write cycle
+
+AIRLINES = ["PK", "PA", "PF", "9P", "EK", "QR", "TK", "SV", "EY", "FZ", "G9", "WY"]
+CITIES   = ["Karachi", "Lahore", "Dubai", "Doha", "Istanbul", "Jeddah", "Riyadh",
+            "Abu Dhabi", "Sharjah", "Muscat", "Quetta", "Gilgit", "Skardu", "Multan"]
+STATUSES = ["On Time", "Delayed", "Boarding", "Landed", "Departed", "Cancelled"]
+
+# DB credentials from environment variables — never hardcoded
+DB_HOST     = os.environ.get("DB_HOST")
+DB_NAME     = os.environ.get("DB_NAME")
+DB_USER     = os.environ.get("DB_USER")
+DB_PASSWORD = os.environ.get("DB_PASSWORD")
+DB_PORT     = int(os.environ.get("DB_PORT", 5432))
+DB_SSLMODE  = os.environ.get("DB_SSLMODE", "prefer")
+
+LOCAL_HOSTS = (None, "", "localhost", "127.0.0.1", "::1")
+
+# Minimal copy of the production tables the site reads, for a scratch DB.
+# migrations/*.sql are applied on top of this.
+BASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS flights (
+    flight_number  TEXT NOT NULL,
+    scheduled_date DATE NOT NULL,
+    type           TEXT NOT NULL,
+    city           TEXT,
+    airline_logo   TEXT,
+    status         TEXT,
+    ST             TEXT,
+    ET             TEXT,
+    last_checked   TIMESTAMPTZ,
+    last_updated   TEXT,
+    nature         TEXT,
+    PRIMARY KEY (flight_number, scheduled_date, type)
+);
+CREATE TABLE IF NOT EXISTS flight_snapshots (
+    id             BIGSERIAL PRIMARY KEY,
+    flight_number  TEXT,
+    scheduled_date DATE,
+    scraped_at     TIMESTAMPTZ,
+    is_changed     BOOLEAN,
+    change_type    TEXT,
+    status         TEXT,
+    ST             TEXT,
+    ET             TEXT,
+    city           TEXT,
+    type           TEXT,
+    airline_logo   TEXT,
+    nature         TEXT
+);
+CREATE TABLE IF NOT EXISTS scraper_status (
+    id       INTEGER PRIMARY KEY,
+    last_run TIMESTAMPTZ
+);
+CREATE TABLE IF NOT EXISTS origin_flights (
+    flight_number  TEXT NOT NULL,
+    scheduled_date DATE NOT NULL,
+    type           TEXT NOT NULL,
+    source_airport TEXT NOT NULL,
+    data_source    TEXT NOT NULL,
+    city           TEXT,
+    airline_logo   TEXT,
+    status         TEXT,
+    ST             TEXT,
+    ET             TEXT,
+    nature         TEXT,
+    last_checked   TIMESTAMPTZ,
+    last_updated   TEXT,
+    PRIMARY KEY (flight_number, scheduled_date, type, source_airport, data_source)
+);
+CREATE TABLE IF NOT EXISTS origin_snapshots (
+    id             BIGSERIAL PRIMARY KEY,
+    flight_number  TEXT,
+    scheduled_date DATE,
+    source_airport TEXT,
+    data_source    TEXT,
+    type           TEXT,
+    scraped_at     TIMESTAMPTZ,
+    is_changed     BOOLEAN,
+    change_type    TEXT,
+    status         TEXT,
+    ST             TEXT,
+    ET             TEXT,
+    city           TEXT,
+    airline_logo   TEXT,
+    nature         TEXT
+);
+CREATE TABLE IF NOT EXISTS origin_scraper_status (
+    scraper_id TEXT PRIMARY KEY,
+    last_run   TIMESTAMPTZ
+);
+"""
+
+
+# ==============================================================================
+#   LOGGING
+# ==============================================================================
+
+def log(msg: str) -> None:
+    """Timestamped stdout log."""
+    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}", flush=True)
+
+
+def connect():
+    return psycopg2.connect(
+        host=DB_HOST, dbname=DB_NAME, user=DB_USER,
+        password=DB_PASSWORD, port=DB_PORT, sslmode=DB_SSLMODE
+    )
+
+
+# ==============================================================================
+#   SCHEMA
+# ==============================================================================
+
+def split_sql(sql: str) -> list[str]:
+    """
+    Split a migration file into statements. Aware of '...' strings,
+    $$ bodies and -- comments, which is all migrations/ uses. Statements are
+    run one by one so CREATE INDEX CONCURRENTLY works (autocommit).
+    """
+    statements, current = [], []
+    i, n = 0, len(sql)
+    in_quote = in_dollar = False
+
+    while i < n:
+        ch = sql[i]
+        if not in_quote and not in_dollar and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end + 1
+            continue
+        if not in_quote and sql.startswith("$$", i):
+            in_dollar = not in_dollar
+            current.append("$$")
+            i += 2
+            continue
+        if not in_dollar and ch == "'":
+            in_quote = not in_quote
+        if ch == ";" and not in_quote and not in_dollar:
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def apply_schema(conn) -> None:
+    """Create the base tables, then apply every migration in order."""
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(BASE_SCHEMA)
+        here = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(here, "migrations", "*.sql"))):
+            for statement in split_sql(open(path).read()):
+                cursor.execute(statement)
+            log(f"  [SCHEMA] Applied {os.path.basename(path)}")
+    conn.autocommit = False
+
+
+# ==============================================================================
+#   SYNTHETIC PAA BOARDS
+# ==============================================================================
+
+def synthetic_board(board_key: str, date_str: str, n: int, cycle: int) -> list[dict]:
+    """
+    Raw PAA-shaped flight dicts for one board. The same board_key always has
+    the same flights; cycle decides which CHANGE_RATE share of them get a new
+    status / ET on this pass.
+    """
+    base = random.Random(board_key)
+    turn = random.Random(f"{board_key}|{cycle}")
+    flights = []
+
+    for i in range(n):
+        airline = base.choice(AIRLINES)
+        city    = base.choice(CITIES)
+        st_min  = base.randrange(0, 24 * 60, 5)
+        delay   = base.choice((0, 0, 0, 5, 10, 20, 45, 90))
+        status  = base.choice(STATUSES[:3])
+
+        if cycle and turn.random() < CHANGE_RATE:
+            delay  += turn.choice((5, 15, 30))
+            status  = turn.choice(STATUSES)
+
+        et_min = (st_min + delay) % (24 * 60)
+        flights.append({
+            "FlightNumber":    f"{airline} {100 + i}",
+            "EnglishFromCity": city,
+            "EnglishToCity":   city,
+            "Logo":            f"https://pics.avs.io/60/60/{airline}.png",
+            "EnglishRemarks":  status,
+            "ST":              f"{st_min // 60:02d}:{st_min % 60:02d}",
+            "ET":              f"{et_min // 60:02d}:{et_min % 60:02d}",
+            "Nature":          "Domestic" if city in CITIES[10:] + CITIES[:2] else "International",
+            "DateUpdated":     f"{date_str}T{st_min // 60:02d}:{st_min % 60:02d}:00",
+        })
+    return flights
+
+
+def write_board(cursor, date_str: str, tag: str, cycle: int, flights_per_board: int) -> int:
+    """Run one synthetic board through scraper.py's real write path."""
+    fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    raw        = synthetic_board(f"{date_str}|{tag}", date_str, flights_per_board, cycle)
+    changed    = scraper.process_board(cursor, date_str, tag, raw, fetched_at)
+    cursor.connection.commit()
+    return changed
+
+
+def write_origin_board(cursor, date_str: str, tag: str, airport: str, cycle: int, flights_per_board: int) -> int:
+    """Run one synthetic airport board through origin_scraper.py's real write path."""
+    fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    raw        = synthetic_board(f"{airport}|{date_str}|{tag}", date_str, flights_per_board, cycle)
+    records    = origin_scraper.normalise_batch(raw, tag, date_str, airport, fetched_at)
+    changed    = origin_scraper.process_batch(cursor, date_str, tag, airport, records)
+    cursor.connection.commit()
+    return changed
+
+
+def seed(conn, days_back: int, flights_per_board: int) -> None:
+    """Fill ~days_back days of boards, SEED_PASSES passes each for history."""
+    apply_schema(conn)
+    scraper.log = lambda msg: None   # per-board scraper logs would drown the output
+
+    today = datetime.date.today()
+    dates = [(today + datetime.timedelta(days=d)).isoformat() for d in range(-days_back, 2)]
+
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    changes = 0
+    for date_str in dates:
+        for tag in ("Arrival", "Departure"):
+            for cycle in range(SEED_PASSES):
+                changes += write_board(cursor, date_str, tag, cycle, flights_per_board)
+    cursor.execute("ANALYZE")
+    conn.commit()
+    cursor.close()
+    log(f"[SEED] {len(dates)} days × 2 boards × {flights_per_board} flights, {changes} snapshots")
+
+
+# ==============================================================================
+#   READ TRAFFIC — the frontend's query shapes
+# ==============================================================================
+
+def pick_date(rnd: random.Random, today: datetime.date) -> str:
+    """Most visitors look at today, some at tomorrow/yesterday, a few further back."""
+    r = rnd.random()
+    if r < 0.70:
+        day = today
+    elif r < 0.85:
+        day = today + datetime.timedelta(days=rnd.choice((-1, 1)))
+    else:
+        day = today - datetime.timedelta(days=rnd.randint(2, SEED_DAYS_BACK))
+    return day.isoformat()
+
+
+def build_query(name: str, rnd: random.Random, today: datetime.date, flights: list) -> tuple[str, tuple]:
+    """SQL + params for one request, mirroring what PostgREST runs for the page."""
+    order = " ORDER BY st_at ASC NULLS LAST"
+
+    if name == "board":
+        return "SELECT * FROM flights WHERE scheduled_date = %s" + order, (pick_date(rnd, today),)
+
+    if name == "board_type":
+        return (
+            "SELECT * FROM flights WHERE scheduled_date = %s AND type = %s" + order,
+            (pick_date(rnd, today), rnd.choice(("Arrival", "Departure"))),
+        )
+
+    if name == "board_nature":
+        return (
+            "SELECT * FROM flights WHERE scheduled_date = %s AND type = %s AND nature = %s" + order,
+            (pick_date(rnd, today), rnd.choice(("Arrival", "Departure")),
+             rnd.choice(("International", "Domestic"))),
+        )
+
+    if name == "search":
+        flight_number = rnd.choice(flights)[0]
+        query = flight_number[:rnd.randint(2, len(flight_number))]   # partial input
+        return (
+            "SELECT * FROM flights WHERE scheduled_date = %s AND flight_number ILIKE %s" + order,
+            (pick_date(rnd, today), f"%{query}%"),
+        )
+
+    flight_number, scheduled_date, tag = rnd.choice(flights)
+
+    if name == "history":
+        return (
+            "SELECT * FROM flight_snapshots WHERE flight_number = %s AND scheduled_date = %s"
+            " ORDER BY scraped_at ASC",
+            (flight_number, scheduled_date),
+        )
+
+    if name == "freshness":
+        return (
+            "SELECT last_checked FROM board_status WHERE scheduled_date = %s AND type = %s",
+            (scheduled_date, tag),
+        )
+
+    raise ValueError(f"Unknown query shape: {name}")
+
+
+def reader(client_id: int, stop: threading.Event, deadline_warmup: float,
+           flights: list, think_ms: float, results: dict, lock: threading.Lock) -> None:
+    """One simulated visitor connection issuing requests back to back."""
+    rnd     = random.Random(client_id)
+    today   = datetime.date.today()
+    names   = list(QUERY_MIX)
+    weights = list(QUERY_MIX.values())
+    local   = {name: [] for name in names}
+    errors  = {name: 0 for name in names}
+
+    conn = connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    try:
+        while not stop.is_set():
+            name = rnd.choices(names, weights)[0]
+            sql, params = build_query(name, rnd, today, flights)
+
+            started = time.perf_counter()
+            try:
+                cursor.execute(sql, params)
+                cursor.fetchall()
+            except psycopg2.Error:
+                errors[name] += 1
+                continue
+            finished = time.perf_counter()
+
+            if started >= deadline_warmup:
+                local[name].append((finished - started) * 1000)
+            if think_ms:
+                time.sleep(rnd.expovariate(1 / think_ms) / 1000)
+    finally:
+        cursor.close()
+        conn.close()
+        with lock:
+            for name in names:
+                results["latencies"][name].extend(local[name])
+                results["errors"][name] += errors[name]
+
+
+# ==============================================================================
+#   WRITE TRAFFIC — scraper cycles running alongside
+# ==============================================================================
+
+def writer(stop: threading.Event, which: str, interval: float, flights_per_board: int, results: dict) -> None:
+    """
+    Scrape cycles over yesterday/today/tomorrow × Arrival/Departure:
+    scraper.py's Islamabad boards and/or origin_scraper.py's WATCH_AIRPORTS.
+    """
+    conn   = connect()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cycle  = SEED_PASSES   # continue where the seed left off
+
+    try:
+        while not stop.is_set():
+            today   = datetime.date.today()
+            dates   = [(today + datetime.timedelta(days=d)).isoformat() for d in (-1, 0, 1)]
+            started = time.perf_counter()
+            changes = 0
+            for date_str in dates:
+                for tag in ("Arrival", "Departure"):
+                    if which in ("scraper", "both"):
+                        changes += write_board(cursor, date_str, tag, cycle, flights_per_board)
+                    if which in ("origin", "both"):
+                        for airport in origin_scraper.WATCH_AIRPORTS:
+                            changes += write_origin_board(cursor, date_str, tag, airport, cycle, flights_per_board)
+            if which in ("scraper", "both"):
+                scraper.update_scraper_status(cursor)
+            if which in ("origin", "both"):
+                origin_scraper.update_scraper_status(cursor)
+            conn.commit()
+
+            results["cycles"].append(time.perf_counter() - started)
+            results["changes"] += changes
+            cycle += 1
+            stop.wait(interval)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# ==============================================================================
+#   REPORT
+# ==============================================================================
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def report(results: dict, measured_s: float, clients: int, which: str) -> None:
+    print()
+    log(f"[RESULT] {clients} clients, {measured_s:.0f}s measured, writer: {which}")
+    log(f"  {'query':<13} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>6}")
+
+    all_latencies = []
+    for name in QUERY_MIX:
+        values = sorted(results["latencies"][name])
+        all_latencies.extend(values)
+        log(
+            f"  {name:<13} {len(values):7d} {len(values) / measured_s:8.1f} "
+            f"{percentile(values, 50):8.2f} {percentile(values, 95):8.2f} "
+            f"{percentile(values, 99):8.2f} {(values[-1] if values else 0):8.2f} "
+            f"{results['errors'][name]:6d}"
+        )
+
+    all_latencies.sort()
+    log(
+        f"  {'ALL':<13} {len(all_latencies):7d} {len(all_latencies) / measured_s:8.1f} "
+        f"{percentile(all_latencies, 50):8.2f} {percentile(all_latencies, 95):8.2f} "
+        f"{percentile(all_latencies, 99):8.2f} {(all_latencies[-1] if all_latencies else 0):8.2f} "
+        f"{sum(results['errors'].values()):6d}"
+    )
+
+    if which != "none":
+        cycles = sorted(results["cycles"])
+        log(
+            f"  [WRITER] {len(cycles)} scrape cycles, {results['changes']} changes — cycle "
+            f"p50 {percentile(cycles, 50):.2f}s, p95 {percentile(cycles, 95):.2f}s, "
+            f"max {(cycles[-1] if cycles else 0):.2f}s"
+        )
+
+
+# ==============================================================================
+#   MAIN
+# ==============================================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the site's read queries against a local Postgres.")
+    parser.add_argument("--seed", action="store_true",
+                        help="create schema, apply migrations/ and load synthetic data, then exit")
+    parser.add_argument("--days", type=int, default=SEED_DAYS_BACK,
+                        help=f"days of history to seed (default: {SEED_DAYS_BACK})")
+    parser.add_argument("--flights-per-board", type=int, default=FLIGHTS_PER_BOARD,
+                        help=f"flights per (date, type) board (default: {FLIGHTS_PER_BOARD})")
+    parser.add_argument("--clients", type=int, default=10, help="concurrent visitor connections (default: 10)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run (default: 30)")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds excluded from stats (default: 3)")
+    parser.add_argument("--think-ms", type=float, default=0,
+                        help="mean pause between a client's requests; 0 = back to back (default: 0)")
+    parser.add_argument("--writer", choices=("both", "scraper", "origin", "none"), default="both",
+                        help="scraper write path(s) to run alongside the reads (default: both)")
+    parser.add_argument("--write-interval", type=float, default=0,
+                        help="seconds between scraper cycles; 0 = continuous (default: 0)")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="allow writing to a non-local DB_HOST (never use against production)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    writes = args.seed or args.writer != "none"
+    if writes and DB_HOST not in LOCAL_HOSTS and not DB_HOST.startswith("/") and not args.allow_remote:
+        log(f"❌ Refusing to write synthetic data to DB_HOST={DB_HOST} — pass --allow-remote if this is a scratch DB")
+        return 2
+
+    conn = connect()
+    log("✅ DB connected")
+
+    if args.seed:
+        seed(conn, args.days, args.flights_per_board)
+        conn.close()
+        return 0
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT flight_number, scheduled_date::text, type
+            FROM flights
+            WHERE scheduled_date >= CURRENT_DATE - %s
+        """, (args.days,))
+        flights = cursor.fetchall()
+    conn.close()
+
+    if not flights:
+        log("❌ No flights to replay against — run with --seed first")
+        return 2
+
+    scraper.log = origin_scraper.log = lambda msg: None
+    results = {
+        "latencies": {name: [] for name in QUERY_MIX},
+        "errors":    {name: 0 for name in QUERY_MIX},
+        "cycles":    [],
+        "changes":   0,
+    }
+    lock    = threading.Lock()
+    stop    = threading.Event()
+    started = time.perf_counter()
+    warm_until = started + args.warmup
+
+    threads = [
+        threading.Thread(
+            target=reader, name=f"reader-{i}",
+            args=(i, stop, warm_until, flights, args.think_ms, results, lock),
+        )
+        for i in range(args.clients)
+    ]
+    if args.writer != "none":
+        threads.append(threading.Thread(
+            target=writer, name="writer",
+            args=(stop, args.writer, args.write_interval, args.flights_per_board, results),
+        ))
+
+    log(f"[LOAD] {args.clients} clients for {args.duration:.0f}s "
+        f"({args.warmup:.0f}s warmup), writer: {args.writer}...")
+    for t in threads:
+        t.start()
+
+    time.sleep(args.duration)
+    stop.set()
+    ended = time.perf_counter()
+    for t in threads:
+        t.join()
+
+    report(results, ended - warm_until, args.clients, args.writer)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
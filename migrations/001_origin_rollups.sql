@@ -0,0 +1,105 @@
+-- =============================================================================
+--  001 — ON-TIME PERFORMANCE ROLLUPS
+--  Small aggregate tables kept up to date by origin_scraper.py (process_batch).
+--  Each scraped board (date, type, airport, source) rewrites only its own keys,
+--  so analytics never need to scan origin_snapshots or parse ST/ET strings.
+--
+--  Unlike origin_flights / origin_snapshots, rollups are NOT deleted by the
+--  7-day cleanup — they are the long-term history.
+-- =============================================================================
+
+
+-- -----------------------------------------------------------------------------
+--  HELPERS — PAA sends ST/ET as "HH:MM" text in PKT
+-- -----------------------------------------------------------------------------
+
+-- "14:35" → 875. NULL for blanks or anything that isn't a clock time
+-- (hours 0-23, two-digit minutes). Same pattern as HHMM_PATTERN in the
+-- scrapers, so backfilled and scraped values agree.
+CREATE OR REPLACE FUNCTION paa_hhmm_minutes(t TEXT)
+RETURNS INTEGER
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT m[1]::int * 60 + m[2]::int
+    FROM (SELECT regexp_match(t, '^\s*([01]?[0-9]|2[0-3]):([0-5][0-9])') AS m) x
+$$;
+
+-- ET minus ST in minutes. A gap of more than 12 hours is treated as a
+-- midnight rollover (ST 23:50, ET 00:20 → +30, not -1410).
+CREATE OR REPLACE FUNCTION paa_delay_minutes(st TEXT, et TEXT)
+RETURNS INTEGER
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN d < -720 THEN d + 1440
+        WHEN d >  720 THEN d - 1440
+        ELSE d
+    END
+    FROM (SELECT paa_hhmm_minutes(et) - paa_hhmm_minutes(st) AS d) x
+$$;
+
+
+-- -----------------------------------------------------------------------------
+--  PER AIRLINE / ROUTE / DAY
+--  airline = first two characters of the flight number ("PK301" → "PK")
+--  city    = the other end of the route ('' when PAA didn't send one)
+-- -----------------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS origin_route_daily (
+    scheduled_date   DATE        NOT NULL,
+    source_airport   TEXT        NOT NULL,
+    data_source      TEXT        NOT NULL,
+    type             TEXT        NOT NULL,
+    airline          TEXT        NOT NULL,
+    city             TEXT        NOT NULL,
+
+    flights          INTEGER     NOT NULL,
+    cancelled        INTEGER     NOT NULL,
+    dropped          INTEGER     NOT NULL,
+    on_time          INTEGER     NOT NULL,   -- delay <= on-time threshold (15 min)
+    delayed          INTEGER     NOT NULL,   -- delay >  on-time threshold
+
+    -- on_time / delayed and the delay distribution only count flights with
+    -- both ST and ET that are not Cancelled or Dropped.
+    -- Buckets above the on-time threshold; on_time covers everything below.
+    -- delay_16_30 starts at ON_TIME_THRESHOLD_MIN + 1 (origin_scraper.py) —
+    -- the name assumes the default threshold of 15.
+    delay_samples    INTEGER     NOT NULL,
+    delay_total_min  INTEGER     NOT NULL,
+    delay_max_min    INTEGER,
+    delay_16_30      INTEGER     NOT NULL,
+    delay_31_60      INTEGER     NOT NULL,
+    delay_61_120     INTEGER     NOT NULL,
+    delay_gt_120     INTEGER     NOT NULL,
+
+    -- Final status per flight, e.g. {"Landed": 12, "Cancelled": 1}
+    status_counts    JSONB       NOT NULL,
+
+    refreshed_at     TIMESTAMPTZ NOT NULL,
+
+    PRIMARY KEY (scheduled_date, source_airport, data_source, type, airline, city)
+);
+
+
+-- -----------------------------------------------------------------------------
+--  PER AIRPORT / HOUR OF DAY (scheduled hour, PKT)
+-- -----------------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS origin_airport_hourly (
+    scheduled_date   DATE        NOT NULL,
+    source_airport   TEXT        NOT NULL,
+    data_source      TEXT        NOT NULL,
+    type             TEXT        NOT NULL,
+    sched_hour       SMALLINT    NOT NULL,   -- 0-23
+
+    flights          INTEGER     NOT NULL,
+    cancelled        INTEGER     NOT NULL,
+    dropped          INTEGER     NOT NULL,
+    on_time          INTEGER     NOT NULL,
+    delayed          INTEGER     NOT NULL,
+    delay_samples    INTEGER     NOT NULL,
+    delay_total_min  INTEGER     NOT NULL,
+    delay_max_min    INTEGER,
+
+    refreshed_at     TIMESTAMPTZ NOT NULL,
+
+    PRIMARY KEY (scheduled_date, source_airport, data_source, type, sched_hour)
+);
@@ -0,0 +1,60 @@
+-- =============================================================================
+--  002 — TYPED SCHEDULE TIMESTAMPS
+--  Both scrapers now parse ST / ET / DateUpdated once and store them as
+--  timestamptz alongside the raw strings, plus a precomputed delay_minutes.
+--
+--    st_at           scheduled_date + ST, PKT
+--    et_at           scheduled_date + ET, PKT — moved across midnight when
+--                    more than 12h from ST (ST 23:50 / ET 00:20 → next day)
+--    delay_minutes   et_at - st_at, NULL unless both are present
+--    last_updated_at DateUpdated as a timestamp (PKT when PAA sends no offset)
+--
+--  Requires 001 (paa_hhmm_minutes / paa_delay_minutes) for the backfill.
+-- =============================================================================
+
+
+ALTER TABLE flights
+    ADD COLUMN IF NOT EXISTS st_at           TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS et_at           TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS delay_minutes   INTEGER,
+    ADD COLUMN IF NOT EXISTS last_updated_at TIMESTAMPTZ;
+
+ALTER TABLE origin_flights
+    ADD COLUMN IF NOT EXISTS st_at           TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS et_at           TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS delay_minutes   INTEGER,
+    ADD COLUMN IF NOT EXISTS last_updated_at TIMESTAMPTZ;
+
+
+-- -----------------------------------------------------------------------------
+--  BACKFILL existing rows (same rules as parse_schedule() in the scrapers).
+--  last_updated_at is only filled going forward — the raw DateUpdated text
+--  isn't guaranteed to cast cleanly.
+-- -----------------------------------------------------------------------------
+
+UPDATE flights
+SET st_at         = (scheduled_date + make_interval(mins => paa_hhmm_minutes(ST))) AT TIME ZONE 'Asia/Karachi',
+    et_at         = COALESCE(
+                        (scheduled_date + make_interval(mins => paa_hhmm_minutes(ST) + paa_delay_minutes(ST, ET))) AT TIME ZONE 'Asia/Karachi',
+                        (scheduled_date + make_interval(mins => paa_hhmm_minutes(ET))) AT TIME ZONE 'Asia/Karachi'
+                    ),
+    delay_minutes = paa_delay_minutes(ST, ET)
+WHERE st_at IS NULL;
+
+UPDATE origin_flights
+SET st_at         = (scheduled_date + make_interval(mins => paa_hhmm_minutes(ST))) AT TIME ZONE 'Asia/Karachi',
+    et_at         = COALESCE(
+                        (scheduled_date + make_interval(mins => paa_hhmm_minutes(ST) + paa_delay_minutes(ST, ET))) AT TIME ZONE 'Asia/Karachi',
+                        (scheduled_date + make_interval(mins => paa_hhmm_minutes(ET))) AT TIME ZONE 'Asia/Karachi'
+                    ),
+    delay_minutes = paa_delay_minutes(ST, ET)
+WHERE st_at IS NULL;
+
+
+-- -----------------------------------------------------------------------------
+--  INDEXES — time-window queries ("departing in the next hour") become
+--  range scans instead of parsing every ST string
+-- -----------------------------------------------------------------------------
+
+CREATE INDEX IF NOT EXISTS flights_st_at_idx        ON flights (st_at);
+CREATE INDEX IF NOT EXISTS origin_flights_st_at_idx ON origin_flights (st_at);
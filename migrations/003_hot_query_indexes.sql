@@ -0,0 +1,60 @@
+-- =============================================================================
+--  003 — HOT QUERY INDEXES
+--  One index per hot path, verified with query_audit.py. Run with psql
+--  (CREATE INDEX CONCURRENTLY can't run inside a transaction block):
+--
+--      psql "$DATABASE_URL" -f migrations/003_hot_query_indexes.sql
+--      python query_audit.py
+--
+--  The per-row key lookups in both scrapers are already served by the unique
+--  indexes behind their ON CONFLICT targets:
+--      flights        (flight_number, scheduled_date, type)
+--      origin_flights (flight_number, scheduled_date, type, source_airport, data_source)
+-- =============================================================================
+
+
+-- -----------------------------------------------------------------------------
+--  DROP CHECK — mark_dropped_flights() in both scrapers
+--  Only non-terminal flights can be dropped, so the index skips finished ones
+--  and stays small. The predicate must match the query's status filter.
+-- -----------------------------------------------------------------------------
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS flights_active_idx
+    ON flights (scheduled_date, type)
+    INCLUDE (flight_number)
+    WHERE status IS NULL OR status <> ALL (ARRAY['Dropped', 'Cancelled', 'Landed', 'Departed']);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS origin_flights_active_idx
+    ON origin_flights (scheduled_date, source_airport, data_source, type)
+    INCLUDE (flight_number)
+    WHERE status IS NULL OR status <> ALL (ARRAY['Dropped', 'Cancelled', 'Landed', 'Departed']);
+
+
+-- -----------------------------------------------------------------------------
+--  STALE-AIRPORT HEALTH QUERY — REFERENCE_QUERIES.txt
+--  Index-only scan: today's rows grouped by airport/source, MAX(last_checked)
+-- -----------------------------------------------------------------------------
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS origin_flights_freshness_idx
+    ON origin_flights (scheduled_date, source_airport, data_source, last_checked);
+
+
+-- -----------------------------------------------------------------------------
+--  FRONTEND BOARD — docs/script.js
+--  scheduled_date = ? [AND type = ?] [AND nature = ?] ORDER BY st_at
+-- -----------------------------------------------------------------------------
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS flights_board_idx
+    ON flights (scheduled_date, type, nature, st_at);
+
+
+-- -----------------------------------------------------------------------------
+--  FLIGHT HISTORY — docs/flight_detail.js and the origin change log
+--  flight_number = ? AND scheduled_date = ? ORDER BY scraped_at
+-- -----------------------------------------------------------------------------
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS flight_snapshots_history_idx
+    ON flight_snapshots (flight_number, scheduled_date, scraped_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS origin_snapshots_history_idx
+    ON origin_snapshots (flight_number, scheduled_date, scraped_at);
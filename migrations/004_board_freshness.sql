@@ -0,0 +1,65 @@
+-- =============================================================================
+--  004 — BOARD-LEVEL FRESHNESS
+--  "When was this board last checked?" is now one row per scraped board
+--  instead of a last_checked rewrite on every flight row every run.
+--  flights / origin_flights rows are only updated when their data changes,
+--  so unchanged flights no longer produce a new tuple version (and the WAL
+--  and vacuum work that comes with it) on each run.
+--
+--  Run with psql (DROP INDEX CONCURRENTLY can't run inside a transaction):
+--      psql "$DATABASE_URL" -f migrations/004_board_freshness.sql
+-- =============================================================================
+
+
+-- -----------------------------------------------------------------------------
+--  ORIGIN SCRAPER — one row per (airport, type, date, source)
+-- -----------------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS origin_board_status (
+    source_airport   TEXT        NOT NULL,
+    type             TEXT        NOT NULL,
+    scheduled_date   DATE        NOT NULL,
+    data_source      TEXT        NOT NULL,
+    last_checked     TIMESTAMPTZ NOT NULL,
+    flight_count     INTEGER,               -- flights on the board at last full fetch
+
+    PRIMARY KEY (scheduled_date, source_airport, data_source, type)
+);
+
+
+-- -----------------------------------------------------------------------------
+--  ORIGINAL ISLAMABAD SCRAPER — one row per (date, type)
+--  Read by docs/flight_detail.js for the "Last checked" label.
+-- -----------------------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS board_status (
+    scheduled_date   DATE        NOT NULL,
+    type             TEXT        NOT NULL,
+    last_checked     TIMESTAMPTZ NOT NULL,
+    flight_count     INTEGER,
+
+    PRIMARY KEY (scheduled_date, type)
+);
+
+-- The frontend reads board_status with the public (anon) key
+ALTER TABLE board_status ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS board_status_public_read ON board_status;
+CREATE POLICY board_status_public_read ON board_status FOR SELECT USING (true);
+
+
+-- -----------------------------------------------------------------------------
+--  Per-row last_checked is now only written together with a data change
+-- -----------------------------------------------------------------------------
+
+COMMENT ON COLUMN flights.last_checked IS
+    'When this row''s data last changed. Board freshness: board_status.last_checked.';
+COMMENT ON COLUMN origin_flights.last_checked IS
+    'When this row''s data last changed. Board freshness: origin_board_status.last_checked.';
+
+
+-- -----------------------------------------------------------------------------
+--  The stale-airport health query now reads origin_board_status, so the
+--  per-row freshness index from 003 is no longer needed.
+-- -----------------------------------------------------------------------------
+
+DROP INDEX CONCURRENTLY IF EXISTS origin_flights_freshness_idx;
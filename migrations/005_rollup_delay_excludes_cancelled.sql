@@ -0,0 +1,74 @@
+-- =============================================================================
+--  005 — ROLLUP DELAYS WITHOUT CANCELLED / DROPPED FLIGHTS
+--  update_rollups() used to count Cancelled and Dropped flights in on_time,
+--  delayed and the delay distribution, from their stale ST/ET. It now leaves
+--  them out. This recomputes those columns for every board still present in
+--  origin_flights (the last 7 days); older rollup rows keep the old numbers.
+--
+--  15 below is ON_TIME_THRESHOLD_MIN in origin_scraper.py.
+--
+--  Run with psql:
+--      psql "$DATABASE_URL" -f migrations/005_rollup_delay_excludes_cancelled.sql
+-- =============================================================================
+
+
+UPDATE origin_route_daily r
+SET on_time         = x.on_time,
+    delayed         = x.delayed,
+    delay_samples   = x.delay_samples,
+    delay_total_min = x.delay_total_min,
+    delay_max_min   = x.delay_max_min,
+    delay_16_30     = x.delay_16_30,
+    delay_31_60     = x.delay_31_60,
+    delay_61_120    = x.delay_61_120,
+    delay_gt_120    = x.delay_gt_120
+FROM (
+    SELECT scheduled_date, source_airport, data_source, type,
+           LEFT(flight_number, 2)                              AS airline,
+           COALESCE(city, '')                                  AS city,
+           COUNT(*) FILTER (WHERE delay <= 15)                 AS on_time,
+           COUNT(*) FILTER (WHERE delay >  15)                 AS delayed,
+           COUNT(delay)                                        AS delay_samples,
+           COALESCE(SUM(delay), 0)                             AS delay_total_min,
+           MAX(delay)                                          AS delay_max_min,
+           COUNT(*) FILTER (WHERE delay >  15 AND delay <= 30) AS delay_16_30,
+           COUNT(*) FILTER (WHERE delay BETWEEN 31 AND 60)     AS delay_31_60,
+           COUNT(*) FILTER (WHERE delay BETWEEN 61 AND 120)    AS delay_61_120,
+           COUNT(*) FILTER (WHERE delay > 120)                 AS delay_gt_120
+    FROM (
+        SELECT *, CASE WHEN status IN ('Cancelled', 'Dropped') THEN NULL
+                       ELSE delay_minutes END AS delay
+        FROM origin_flights
+    ) f
+    GROUP BY 1, 2, 3, 4, 5, 6
+) x
+WHERE r.scheduled_date = x.scheduled_date AND r.source_airport = x.source_airport
+  AND r.data_source    = x.data_source    AND r.type           = x.type
+  AND r.airline        = x.airline        AND r.city           = x.city;
+
+
+UPDATE origin_airport_hourly h
+SET on_time         = x.on_time,
+    delayed         = x.delayed,
+    delay_samples   = x.delay_samples,
+    delay_total_min = x.delay_total_min,
+    delay_max_min   = x.delay_max_min
+FROM (
+    SELECT scheduled_date, source_airport, data_source, type,
+           EXTRACT(HOUR FROM st_at AT TIME ZONE 'Asia/Karachi')::int AS sched_hour,
+           COUNT(*) FILTER (WHERE delay <= 15)                       AS on_time,
+           COUNT(*) FILTER (WHERE delay >  15)                       AS delayed,
+           COUNT(delay)                                              AS delay_samples,
+           COALESCE(SUM(delay), 0)                                   AS delay_total_min,
+           MAX(delay)                                                AS delay_max_min
+    FROM (
+        SELECT *, CASE WHEN status IN ('Cancelled', 'Dropped') THEN NULL
+                       ELSE delay_minutes END AS delay
+        FROM origin_flights
+    ) f
+    WHERE st_at IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+) x
+WHERE h.scheduled_date = x.scheduled_date AND h.source_airport = x.source_airport
+  AND h.data_source    = x.data_source    AND h.type           = x.type
+  AND h.sched_hour     = x.sched_hour;
@@ -0,0 +1,68 @@
+-- =============================================================================
+--  006 — ONE DEFINITION OF A VALID "HH:MM"
+--  paa_hhmm_minutes() (used by the 002 backfill) accepted hours >= 24
+--  ("24:10" → next day) but rejected single-digit minutes; the scrapers'
+--  parse_schedule_time() did the opposite. Both now accept exactly
+--  ^\s*([01]?[0-9]|2[0-3]):([0-5][0-9]) — see HHMM_PATTERN in the scrapers.
+--
+--  Redefines the function and corrects st_at / et_at / delay_minutes on the
+--  rows where the two used to disagree. Rows already in agreement are not
+--  touched. Rollups pick up the corrected delays the next time their board
+--  is scraped.
+--
+--  Run with psql:
+--      psql "$DATABASE_URL" -f migrations/006_strict_hhmm_parsing.sql
+-- =============================================================================
+
+
+CREATE OR REPLACE FUNCTION paa_hhmm_minutes(t TEXT)
+RETURNS INTEGER
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT m[1]::int * 60 + m[2]::int
+    FROM (SELECT regexp_match(t, '^\s*([01]?[0-9]|2[0-3]):([0-5][0-9])') AS m) x
+$$;
+
+
+-- -----------------------------------------------------------------------------
+--  RE-PARSE — same expressions as the 002 backfill
+-- -----------------------------------------------------------------------------
+
+UPDATE flights f
+SET st_at         = x.st_at,
+    et_at         = x.et_at,
+    delay_minutes = x.delay_minutes
+FROM (
+    SELECT flight_number, scheduled_date, type,
+           (scheduled_date + make_interval(mins => paa_hhmm_minutes(ST))) AT TIME ZONE 'Asia/Karachi' AS st_at,
+           COALESCE(
+               (scheduled_date + make_interval(mins => paa_hhmm_minutes(ST) + paa_delay_minutes(ST, ET))) AT TIME ZONE 'Asia/Karachi',
+               (scheduled_date + make_interval(mins => paa_hhmm_minutes(ET))) AT TIME ZONE 'Asia/Karachi'
+           ) AS et_at,
+           paa_delay_minutes(ST, ET) AS delay_minutes
+    FROM flights
+) x
+WHERE f.flight_number  = x.flight_number
+  AND f.scheduled_date = x.scheduled_date
+  AND f.type           = x.type
+  AND (f.st_at, f.et_at, f.delay_minutes) IS DISTINCT FROM (x.st_at, x.et_at, x.delay_minutes);
+
+UPDATE origin_flights f
+SET st_at         = x.st_at,
+    et_at         = x.et_at,
+    delay_minutes = x.delay_minutes
+FROM (
+    SELECT flight_number, scheduled_date, type, source_airport, data_source,
+           (scheduled_date + make_interval(mins => paa_hhmm_minutes(ST))) AT TIME ZONE 'Asia/Karachi' AS st_at,
+           COALESCE(
+               (scheduled_date + make_interval(mins => paa_hhmm_minutes(ST) + paa_delay_minutes(ST, ET))) AT TIME ZONE 'Asia/Karachi',
+               (scheduled_date + make_interval(mins => paa_hhmm_minutes(ET))) AT TIME ZONE 'Asia/Karachi'
+           ) AS et_at,
+           paa_delay_minutes(ST, ET) AS delay_minutes
+    FROM origin_flights
+) x
+WHERE f.flight_number  = x.flight_number
+  AND f.scheduled_date = x.scheduled_date
+  AND f.type           = x.type
+  AND f.source_airport = x.source_airport
+  AND f.data_source    = x.data_source
+  AND (f.st_at, f.et_at, f.delay_minutes) IS DISTINCT FROM (x.st_at, x.et_at, x.delay_minutes);
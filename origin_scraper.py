@@ -7,6 +7,10 @@ PAA API and writes it to the origin_flights / origin_snapshots tables.
 
 Performance design:
   - FETCH phase  : all API calls run concurrently (ThreadPoolExecutor)
+                   and each response is normalised into compact FlightRecords
+                   inside its worker, so raw PAA payloads never pile up
+  - HTTP CACHE   : boards unchanged since the last run (304, or same body
+                   hash) skip JSON decoding, normalisation and the DB write
   - WRITE phase  : all DB writes run sequentially in the main thread
   This keeps psycopg2 single-threaded (safe) while cutting runtime from
   ~18 minutes down to ~4 minutes.
@@ -17,11 +21,18 @@ Key design decisions:
   - data_source = "paa" for all records from this scraper
   - Future scrapers (ADS-B, airline websites) write to the same tables
     with a different data_source — no schema changes needed
+  - On-time rollups (origin_route_daily / origin_airport_hourly) are refreshed
+    per board as part of the write, so analytics never scan raw history
 
 Run: manually from GitHub Actions until confirmed stable, then add cron.
 """
 
 import os
+import re
+import argparse
+import sys
+import json
+import hashlib
 import datetime
 import requests
 import urllib3
@@ -29,6 +40,13 @@ import psycopg2
 from psycopg2.extras import execute_values, RealDictCursor
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import profiling
+
+try:
+    import resource   # Unix only — used for the peak RSS line in the run log
+except ImportError:
+    resource = None
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
@@ -60,6 +78,21 @@ PAA_TEMPLATE = "https://paaconnectapi.paa.gov.pk/api/flights/{date}/{type}/{city
 # Statuses that mean a flight is finished — skip re-snapshotting these
 TERMINAL_STATUSES = ("Dropped", "Cancelled", "Landed", "Departed")
 
+# PAA times (ST/ET/DateUpdated) are Pakistan local time. PKT has had no DST
+# since 2009, so a fixed +05:00 offset avoids depending on tzdata.
+PKT = datetime.timezone(datetime.timedelta(hours=5), "PKT")
+
+# A valid PAA clock time: 0-23 hours, two-digit minutes. Trailing text
+# ("14:35:00") is ignored. Must match paa_hhmm_minutes() in migrations/
+# so backfilled and scraped st_at / et_at agree.
+HHMM_PATTERN = re.compile(r"\s*([01]?[0-9]|2[0-3]):([0-5][0-9])", re.ASCII)
+
+# A flight counts as on time if ET is at most this many minutes after ST.
+# Used by the rollup tables (origin_route_daily / origin_airport_hourly).
+# The first delay bucket starts right above it; its column is named
+# delay_16_30 for the default of 15 — rename it in a migration if this changes.
+ON_TIME_THRESHOLD_MIN = 15
+
 # Days relative to today to scrape (-1 = yesterday, 0 = today, 1 = tomorrow)
 DAY_OFFSETS = [-1, 0, 1]
 
@@ -71,6 +104,18 @@ FETCH_WORKERS = 6
 # Tuple form fails fast on a stalled connection instead of hanging silently.
 REQUEST_TIMEOUT = (5, 15)
 
+# On-disk cache of PAA board responses, keyed by URL. Stores the ETag /
+# Last-Modified validators (sent back as conditional headers) and a hash of
+# the body for when PAA ignores them. Persisted between Actions runs by the
+# actions/cache step in origin_scraper.yml.
+HTTP_CACHE_PATH = os.environ.get("PAA_CACHE_PATH", ".paa_cache/boards.json")
+
+# A cache hit skips process_batch entirely, so a board PAA hasn't changed is
+# never rewritten. Bump this whenever flatten_flight, process_batch or the
+# tables they write change — a cache with another version is discarded and
+# every board is written once more.
+CACHE_VERSION = 1
+
 # DB credentials from environment variables — never hardcoded
 DB_HOST     = os.environ.get("DB_HOST")
 DB_NAME     = os.environ.get("DB_NAME")
@@ -89,27 +134,114 @@ def log(msg: str) -> None:
     print(f"[{ts}] {msg}", flush=True)   # flush=True ensures lines appear immediately in Actions
 
 
+# ==============================================================================
+#   HTTP CACHE (conditional requests for unchanged boards)
+# ==============================================================================
+
+# Cache outcomes per board fetch
+CACHE_MISS         = "miss"           # new or changed board — parsed and written
+CACHE_NOT_MODIFIED = "not_modified"   # PAA answered 304 to our validators
+CACHE_UNCHANGED    = "unchanged"      # 200, but the body hash matches last run
+CACHE_ERROR        = "error"          # fetch failed
+CACHE_HITS         = (CACHE_NOT_MODIFIED, CACHE_UNCHANGED)
+
+
+def board_url(date_str: str, flight_type: str, city: str) -> str:
+    return PAA_TEMPLATE.format(date=date_str, type=flight_type, city=city)
+
+
+def load_http_cache(path: str) -> dict:
+    """
+    Load the URL → {etag, last_modified, body_hash} map. Empty if missing,
+    corrupt or written under a different CACHE_VERSION.
+    """
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        log(f"  [CACHE] Ignoring unreadable cache {path}: {e}")
+        return {}
+
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        log("  [CACHE] Discarding cache from another version — every board is rewritten this run")
+        return {}
+    boards = cache.get("boards")
+    return boards if isinstance(boards, dict) else {}
+
+
+def save_http_cache(path: str, cache: dict) -> None:
+    """Write the cache atomically so an interrupted run can't leave half a file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": CACHE_VERSION, "boards": cache}, f)
+    os.replace(tmp_path, path)
+
+
 # ==============================================================================
 #   PHASE 1 — FETCH (runs concurrently)
 # ==============================================================================
 
-def fetch_flights(date_str: str, flight_type: str, city: str) -> tuple[str, str, str, list[dict]]:
+def fetch_flights(
+    date_str: str,
+    flight_type: str,
+    city: str,
+    cached: dict | None = None,
+) -> tuple[str, str, str, list["FlightRecord"], str, dict | None]:
     """
-    Fetch flights from the PAA API for one (date, type, airport) combination.
+    Fetch flights from the PAA API for one (date, type, airport) combination
+    and normalise them straight away.
     Designed to run in a thread — does NO database work.
 
+    The raw JSON payload only lives for the duration of this call; what is
+    kept for the write phase is the list of FlightRecords.
+
+    cached is this board's entry from the HTTP cache (or None). Its validators
+    are sent as If-None-Match / If-Modified-Since; if PAA answers 304, or the
+    body hashes the same as last time, the board is reported as a cache hit
+    and never decoded.
+
     Returns:
-        (date_str, flight_type, city, raw_flights)
-        raw_flights is [] on failure so the caller can safely skip it.
+        (date_str, flight_type, city, records, cache_status, cache_entry)
+        records is [] on failure or cache hit so the caller can safely skip it.
+        cache_entry is what to store for this URL once the batch is committed.
     """
-    url = PAA_TEMPLATE.format(date=date_str, type=flight_type, city=city)
+    url     = board_url(date_str, flight_type, city)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
     try:
-        r = requests.get(url, verify=False, timeout=REQUEST_TIMEOUT)
+        r = requests.get(url, verify=False, timeout=REQUEST_TIMEOUT, headers=headers)
+
+        if r.status_code == 304 and cached:
+            log(f"  [CACHE] not modified — {flight_type:<11} | {city:<12} | {date_str}")
+            return date_str, flight_type, city, [], CACHE_NOT_MODIFIED, cached
+
         if r.status_code == 200:
+            fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            entry = {
+                "etag":          r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "body_hash":     hashlib.sha256(r.content).hexdigest(),
+            }
+
+            if cached and cached.get("body_hash") == entry["body_hash"]:
+                log(f"  [CACHE] unchanged    — {flight_type:<11} | {city:<12} | {date_str}")
+                return date_str, flight_type, city, [], CACHE_UNCHANGED, entry
+
             data = r.json()
             if isinstance(data, list):
                 log(f"  [FETCH] {len(data):3d} flights — {flight_type:<11} | {city:<12} | {date_str}")
-                return date_str, flight_type, city, data
+                records = normalise_batch(data, flight_type, date_str, city, fetched_at)
+                return date_str, flight_type, city, records, CACHE_MISS, entry
         log(f"  [WARN]  HTTP {r.status_code} — {flight_type:<11} | {city:<12} | {date_str}")
     except requests.exceptions.ConnectTimeout:
         log(f"  [WARN]  Connect timeout — {flight_type:<11} | {city:<12} | {date_str}")
@@ -117,16 +249,18 @@ def fetch_flights(date_str: str, flight_type: str, city: str) -> tuple[str, str,
         log(f"  [WARN]  Read timeout — {flight_type:<11} | {city:<12} | {date_str}")
     except Exception as e:
         log(f"  [ERROR] {e} — {flight_type:<11} | {city:<12} | {date_str}")
-    return date_str, flight_type, city, []
+    return date_str, flight_type, city, [], CACHE_ERROR, None
 
 
-def fetch_all(dates: list[str]) -> list[tuple]:
+def fetch_all(dates: list[str], http_cache: dict) -> list[tuple]:
     """
     Fire all (date, type, airport) fetch jobs concurrently and collect results.
+    http_cache is only read here — entries are updated by main() after each
+    batch commits, so a failed write never marks a board as already seen.
 
     Returns:
-        List of (date_str, flight_type, city, raw_flights) tuples,
-        in completion order (not submission order — doesn't matter for writes).
+        List of (date_str, flight_type, city, records, cache_status, cache_entry)
+        tuples, in completion order (not submission order — doesn't matter for writes).
     """
     # Build every combination upfront
     jobs = [
@@ -142,7 +276,10 @@ def fetch_all(dates: list[str]) -> list[tuple]:
     results = []
     with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
         futures = {
-            executor.submit(fetch_flights, date_str, flight_type, airport): (date_str, flight_type, airport)
+            executor.submit(
+                fetch_flights, date_str, flight_type, airport,
+                http_cache.get(board_url(date_str, flight_type, airport)),
+            ): (date_str, flight_type, airport)
             for date_str, flight_type, airport in jobs
         }
         for future in as_completed(futures):
@@ -153,55 +290,194 @@ def fetch_all(dates: list[str]) -> list[tuple]:
 
 
 # ==============================================================================
-#   PHASE 2 — PROCESS & WRITE (runs sequentially in main thread)
+#   TIME PARSING (PAA strings → timezone-aware timestamps)
 # ==============================================================================
 
+def parse_schedule_time(date_str: str, hhmm: str | None) -> datetime.datetime | None:
+    """
+    Combine a scheduled date with a PAA "HH:MM" time into a PKT timestamp.
+    Returns None for blank or malformed times.
+    """
+    match = HHMM_PATTERN.match(hhmm) if isinstance(hhmm, str) else None
+    if not match:
+        return None
+    try:
+        day = datetime.date.fromisoformat(date_str)
+    except ValueError:
+        return None
+    return datetime.datetime.combine(day, datetime.time(int(match[1]), int(match[2])), tzinfo=PKT)
+
+
+def parse_schedule(
+    date_str: str,
+    st: str | None,
+    et: str | None,
+) -> tuple[datetime.datetime | None, datetime.datetime | None, int | None]:
+    """
+    Parse ST/ET into (st_at, et_at, delay_minutes).
+
+    PAA only sends clock times, so ET is placed on whichever day keeps it
+    within 12 hours of ST — ST 23:50 / ET 00:20 is a 30 minute delay into the
+    next day, not 23.5 hours early.
+    """
+    st_at = parse_schedule_time(date_str, st)
+    et_at = parse_schedule_time(date_str, et)
+
+    if st_at is None or et_at is None:
+        return st_at, et_at, None
+
+    gap = et_at - st_at
+    if gap < -datetime.timedelta(hours=12):
+        et_at += datetime.timedelta(days=1)
+    elif gap > datetime.timedelta(hours=12):
+        et_at -= datetime.timedelta(days=1)
+
+    return st_at, et_at, int((et_at - st_at).total_seconds() // 60)
+
+
+def parse_updated_at(value: str | None) -> datetime.datetime | None:
+    """Parse PAA's DateUpdated (ISO-ish, PKT when no offset is given)."""
+    if not value:
+        return None
+    try:
+        ts = datetime.datetime.fromisoformat(value.strip())
+    except (ValueError, AttributeError):
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=PKT)
+
+
+# ==============================================================================
+#   NORMALISE (runs in the fetch threads)
+# ==============================================================================
+
+class FlightRecord:
+    """
+    One normalised PAA flight, ready for DB insertion.
+
+    __slots__ keeps each record to a fixed set of attribute slots instead of a
+    per-instance dict — 36 boards × every flight adds up. Records also support
+    record["field"], so one can be passed to psycopg2 as the mapping for
+    %(field)s placeholders just like the flat dicts it replaces.
+    """
+
+    __slots__ = (
+        "flight_number", "scheduled_date", "type", "source_airport", "data_source",
+        "city", "airline_logo", "status", "ST", "ET", "nature",
+        "last_checked", "last_updated",
+        "st_at", "et_at", "delay_minutes", "last_updated_at",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __repr__(self) -> str:
+        return f"<FlightRecord {self.flight_number} {self.type} {self.source_airport} {self.scheduled_date}>"
+
+    def snapshot_row(self, scraped_at: str, change_type: str) -> tuple:
+        """Row for the origin_snapshots batch insert (column order matches process_batch)."""
+        return (
+            self.flight_number, self.scheduled_date,
+            self.source_airport, self.data_source, self.type,
+            scraped_at, True, change_type,
+            self.status, self.ST, self.ET,
+            self.city, self.airline_logo, self.nature,
+        )
+
+
+def _intern(value):
+    """Share one copy of low-cardinality strings (cities, statuses, logo URLs)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
 def flatten_flight(
     raw: dict,
     flight_type: str,
     date_str: str,
     source_airport: str,
     fetched_at: str,
-) -> dict | None:
+) -> FlightRecord | None:
     """
-    Convert a raw PAA API dict into a flat dict ready for DB insertion.
+    Convert a raw PAA API dict into a FlightRecord ready for DB insertion.
 
     PAA returns the "other end" of the route differently per type:
       Arrival   → EnglishFromCity (where it came from)
       Departure → EnglishToCity   (where it is going)
 
+    ST/ET are kept verbatim for display and change detection, and also parsed
+    once into st_at / et_at / delay_minutes so queries can range-scan and sort
+    on real timestamps.
+
     Returns None if the record has no flight number (unusable).
     """
     flight_number = raw.get("FlightNumber")
     if not flight_number:
         return None
 
-    return {
-        "flight_number":  flight_number.replace(" ", ""),   # "TK 571" → "TK571"
-        "scheduled_date": date_str,
-        "type":           flight_type,
-        "source_airport": source_airport,
-        "data_source":    DATA_SOURCE,
-        "city":           raw.get("EnglishFromCity") if flight_type == "Arrival" else raw.get("EnglishToCity"),
-        "airline_logo":   raw.get("Logo"),
-        "status":         raw.get("EnglishRemarks"),
-        "ST":             raw.get("ST"),
-        "ET":             raw.get("ET"),
-        "nature":         raw.get("Nature"),
-        "last_checked":   fetched_at,
-        "last_updated":   raw.get("DateUpdated"),
-    }
+    st_at, et_at, delay_minutes = parse_schedule(date_str, raw.get("ST"), raw.get("ET"))
+
+    return FlightRecord(
+        flight_number   = flight_number.replace(" ", ""),   # "TK 571" → "TK571"
+        scheduled_date  = date_str,
+        type            = flight_type,
+        source_airport  = source_airport,
+        data_source     = DATA_SOURCE,
+        city            = _intern(raw.get("EnglishFromCity") if flight_type == "Arrival" else raw.get("EnglishToCity")),
+        airline_logo    = _intern(raw.get("Logo")),
+        status          = _intern(raw.get("EnglishRemarks")),
+        ST              = raw.get("ST"),
+        ET              = raw.get("ET"),
+        nature          = _intern(raw.get("Nature")),
+        last_checked    = fetched_at,
+        last_updated    = raw.get("DateUpdated"),
+        st_at           = st_at,
+        et_at           = et_at,
+        delay_minutes   = delay_minutes,
+        last_updated_at = parse_updated_at(raw.get("DateUpdated")),
+    )
 
 
-def is_isb_relevant(flat: dict) -> bool:
+def is_isb_relevant(record: FlightRecord) -> bool:
     """Returns True if this flight has a leg to or from Islamabad."""
     return (
-        flat["source_airport"] == "Islamabad"
-        or flat["city"] == "Islamabad"
+        record.source_airport == "Islamabad"
+        or record.city == "Islamabad"
     )
 
 
-def detect_change(existing: dict | None, flat: dict) -> tuple[bool, str | None]:
+def normalise_batch(
+    raw_flights: list[dict],
+    flight_type: str,
+    date_str: str,
+    source_airport: str,
+    fetched_at: str,
+) -> list[FlightRecord]:
+    """
+    Flatten one board's raw payload, dropping unusable records and (when
+    REQUIRE_ISB_LEG is set) flights without an Islamabad leg.
+    """
+    records = []
+    for raw in raw_flights:
+        record = flatten_flight(raw, flight_type, date_str, source_airport, fetched_at)
+        if record is None:
+            continue
+        if REQUIRE_ISB_LEG and not is_isb_relevant(record):
+            continue
+        records.append(record)
+    return records
+
+
+# ==============================================================================
+#   PHASE 2 — PROCESS & WRITE (runs sequentially in main thread)
+# ==============================================================================
+
+def detect_change(existing: dict | None, record: FlightRecord) -> tuple[bool, str | None]:
     """
     Compare the current DB row against freshly fetched data.
 
@@ -211,11 +487,11 @@ def detect_change(existing: dict | None, flat: dict) -> tuple[bool, str | None]:
     """
     if existing is None:
         return True, "new"
-    if existing["status"] != flat["status"]:
+    if existing["status"] != record.status:
         return True, "status_change"
-    if existing["st"] != flat["ST"] or existing["et"] != flat["ET"]:
+    if existing["st"] != record.ST or existing["et"] != record.ET:
         return True, "time_change"
-    if existing["city"] != flat["city"]:
+    if existing["city"] != record.city:
         return True, "city_change"
     return False, None
 
@@ -285,40 +561,36 @@ def process_batch(
     date_str: str,
     flight_type: str,
     airport: str,
-    raw_flights: list[dict],
+    records: list[FlightRecord],
 ) -> int:
     """
     Process and write one (date, type, airport) batch to the DB.
     Runs in the main thread — no concurrent DB access.
 
     Steps:
-      1. Flatten and optionally filter each raw flight
+      1. Take the FlightRecords normalised during the fetch phase
       2. Detect changes against existing DB rows
       3. Upsert into origin_flights
       4. Batch-insert snapshots for changed flights only
       5. Mark silently dropped flights
+      6. Refresh the rollup rows for this board
+      7. Record board freshness in origin_board_status
 
     Returns:
         Number of changes recorded.
     """
-    fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
-
-    if not raw_flights:
+    if not records:
         return 0
 
+    # Every record in a batch was stamped with the same fetch time
+    fetched_at = records[0].last_checked
+
     seen_flight_numbers = set()
     snapshot_rows       = []
     changed_count       = 0
 
-    for raw in raw_flights:
-        flat = flatten_flight(raw, flight_type, date_str, airport, fetched_at)
-        if flat is None:
-            continue
-
-        if REQUIRE_ISB_LEG and not is_isb_relevant(flat):
-            continue
-
-        seen_flight_numbers.add(flat["flight_number"])
+    for record in records:
+        seen_flight_numbers.add(record.flight_number)
 
         # Check existing row
         cursor.execute("""
@@ -329,20 +601,25 @@ def process_batch(
               AND type           = %(type)s
               AND source_airport = %(source_airport)s
               AND data_source    = %(data_source)s
-        """, flat)
+        """, record)
         existing = cursor.fetchone()
 
-        is_changed, change_type = detect_change(existing, flat)
+        is_changed, change_type = detect_change(existing, record)
 
-        # Upsert current state — last_updated only advances on meaningful changes
+        # Upsert current state — last_updated only advances on meaningful changes.
+        # The WHERE guard skips the update entirely when nothing differs, so an
+        # unchanged flight writes no new row version; freshness is recorded
+        # once per board in origin_board_status instead.
         cursor.execute("""
             INSERT INTO origin_flights (
                 flight_number, scheduled_date, type, source_airport, data_source,
-                city, airline_logo, status, ST, ET, nature, last_checked, last_updated
+                city, airline_logo, status, ST, ET, nature, last_checked, last_updated,
+                st_at, et_at, delay_minutes, last_updated_at
             ) VALUES (
                 %(flight_number)s, %(scheduled_date)s, %(type)s, %(source_airport)s, %(data_source)s,
                 %(city)s, %(airline_logo)s, %(status)s, %(ST)s, %(ET)s, %(nature)s,
-                %(last_checked)s, %(last_updated)s
+                %(last_checked)s, %(last_updated)s,
+                %(st_at)s, %(et_at)s, %(delay_minutes)s, %(last_updated_at)s
             )
             ON CONFLICT (flight_number, scheduled_date, type, source_airport, data_source)
             DO UPDATE SET
@@ -351,6 +628,9 @@ def process_batch(
                 status        = EXCLUDED.status,
                 ST            = EXCLUDED.ST,
                 ET            = EXCLUDED.ET,
+                st_at         = EXCLUDED.st_at,
+                et_at         = EXCLUDED.et_at,
+                delay_minutes = EXCLUDED.delay_minutes,
                 nature        = EXCLUDED.nature,
                 last_checked  = EXCLUDED.last_checked,
                 last_updated  = CASE
@@ -360,18 +640,27 @@ def process_batch(
                       OR origin_flights.city   IS DISTINCT FROM EXCLUDED.city
                     THEN EXCLUDED.last_updated
                     ELSE origin_flights.last_updated
+                END,
+                last_updated_at = CASE
+                    WHEN origin_flights.status IS DISTINCT FROM EXCLUDED.status
+                      OR origin_flights.ST     IS DISTINCT FROM EXCLUDED.ST
+                      OR origin_flights.ET     IS DISTINCT FROM EXCLUDED.ET
+                      OR origin_flights.city   IS DISTINCT FROM EXCLUDED.city
+                    THEN EXCLUDED.last_updated_at
+                    ELSE origin_flights.last_updated_at
                 END
-        """, flat)
+            WHERE (origin_flights.city, origin_flights.airline_logo, origin_flights.status,
+                   origin_flights.ST, origin_flights.ET, origin_flights.nature,
+                   origin_flights.st_at, origin_flights.et_at, origin_flights.delay_minutes)
+                  IS DISTINCT FROM
+                  (EXCLUDED.city, EXCLUDED.airline_logo, EXCLUDED.status,
+                   EXCLUDED.ST, EXCLUDED.ET, EXCLUDED.nature,
+                   EXCLUDED.st_at, EXCLUDED.et_at, EXCLUDED.delay_minutes)
+        """, record)
 
         if is_changed:
             changed_count += 1
-            snapshot_rows.append((
-                flat["flight_number"], flat["scheduled_date"],
-                flat["source_airport"], flat["data_source"], flat["type"],
-                fetched_at, True, change_type,
-                flat["status"], flat["ST"], flat["ET"],
-                flat["city"], flat["airline_logo"], flat["nature"],
-            ))
+            snapshot_rows.append(record.snapshot_row(fetched_at, change_type))
 
     # Batch insert all snapshots for this batch at once
     if snapshot_rows:
@@ -385,9 +674,210 @@ def process_batch(
 
     mark_dropped_flights(cursor, date_str, flight_type, airport, seen_flight_numbers, fetched_at)
 
+    update_rollups(cursor, date_str, flight_type, airport, fetched_at)
+
+    touch_board(cursor, date_str, flight_type, airport, fetched_at, len(seen_flight_numbers))
+
     return changed_count
 
 
+def touch_board(
+    cursor,
+    date_str: str,
+    flight_type: str,
+    source_airport: str,
+    fetched_at: str,
+    flight_count: int | None = None,
+) -> None:
+    """
+    Record that a board was checked — one row per (airport, type, date, source)
+    in origin_board_status, instead of rewriting last_checked on every flight.
+
+    Called at the end of process_batch, and on its own for HTTP cache hits
+    (flight_count=None keeps the count from the last full fetch).
+    """
+    cursor.execute("""
+        INSERT INTO origin_board_status (
+            source_airport, type, scheduled_date, data_source, last_checked, flight_count
+        ) VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (scheduled_date, source_airport, data_source, type)
+        DO UPDATE SET
+            last_checked = EXCLUDED.last_checked,
+            flight_count = COALESCE(EXCLUDED.flight_count, origin_board_status.flight_count)
+    """, (source_airport, flight_type, date_str, DATA_SOURCE, fetched_at, flight_count))
+
+
+# ==============================================================================
+#   ROLLUPS (on-time performance aggregates — see migrations/001)
+# ==============================================================================
+
+# Columns compared before rewriting a rollup row, so unchanged keys produce
+# no new tuple versions.
+ROUTE_ROLLUP_COLUMNS = (
+    "flights", "cancelled", "dropped", "on_time", "delayed",
+    "delay_samples", "delay_total_min", "delay_max_min",
+    "delay_16_30", "delay_31_60", "delay_61_120", "delay_gt_120",
+    "status_counts",
+)
+HOURLY_ROLLUP_COLUMNS = (
+    "flights", "cancelled", "dropped", "on_time", "delayed",
+    "delay_samples", "delay_total_min", "delay_max_min",
+)
+
+
+def _rollup_upsert_clause(table: str, columns: tuple[str, ...]) -> str:
+    """SET list + change guard for an ON CONFLICT DO UPDATE on a rollup table."""
+    sets     = ",\n                ".join(f"{c} = EXCLUDED.{c}" for c in columns)
+    current  = ", ".join(f"{table}.{c}" for c in columns)
+    incoming = ", ".join(f"EXCLUDED.{c}" for c in columns)
+    return f"""
+            DO UPDATE SET
+                {sets},
+                refreshed_at = EXCLUDED.refreshed_at
+            WHERE ({current}) IS DISTINCT FROM ({incoming})
+    """
+
+
+def update_rollups(
+    cursor,
+    date_str: str,
+    flight_type: str,
+    source_airport: str,
+    fetched_at: str,
+) -> None:
+    """
+    Recompute the rollup rows for one (date, type, airport) board from the
+    current origin_flights state, which already reflects this run's upserts
+    and drops.
+
+    Cancelled and Dropped flights count towards flights / cancelled / dropped
+    and status_counts only — their ST/ET are stale, so they are kept out of
+    every on-time and delay figure.
+
+    Only this board's keys are touched:
+      - keys whose numbers changed are rewritten
+      - keys whose numbers are identical are left alone (no dead tuples)
+      - keys that no longer exist (e.g. a flight changed city) are deleted
+    """
+    params = {
+        "date":    date_str,
+        "type":    flight_type,
+        "airport": source_airport,
+        "source":  DATA_SOURCE,
+        "on_time": ON_TIME_THRESHOLD_MIN,
+        "now":     fetched_at,
+    }
+
+    cursor.execute("""
+        WITH board AS (
+            SELECT LEFT(flight_number, 2)     AS airline,
+                   COALESCE(city, '')         AS city,
+                   status,
+                   CASE WHEN status IN ('Cancelled', 'Dropped') THEN NULL
+                        ELSE delay_minutes END AS delay
+            FROM origin_flights
+            WHERE scheduled_date = %(date)s AND type = %(type)s
+              AND source_airport = %(airport)s AND data_source = %(source)s
+        ),
+        statuses AS (
+            SELECT airline, city, jsonb_object_agg(status, n) AS status_counts
+            FROM (
+                SELECT airline, city, COALESCE(status, 'Unknown') AS status, COUNT(*) AS n
+                FROM board
+                GROUP BY 1, 2, 3
+            ) s
+            GROUP BY airline, city
+        )
+        INSERT INTO origin_route_daily (
+            scheduled_date, source_airport, data_source, type, airline, city,
+            flights, cancelled, dropped, on_time, delayed,
+            delay_samples, delay_total_min, delay_max_min,
+            delay_16_30, delay_31_60, delay_61_120, delay_gt_120,
+            status_counts, refreshed_at
+        )
+        SELECT
+            %(date)s, %(airport)s, %(source)s, %(type)s, b.airline, b.city,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE b.status = 'Cancelled'),
+            COUNT(*) FILTER (WHERE b.status = 'Dropped'),
+            COUNT(*) FILTER (WHERE b.delay <= %(on_time)s),
+            COUNT(*) FILTER (WHERE b.delay >  %(on_time)s),
+            COUNT(b.delay),
+            COALESCE(SUM(b.delay), 0),
+            MAX(b.delay),
+            COUNT(*) FILTER (WHERE b.delay >  %(on_time)s AND b.delay <= 30),
+            COUNT(*) FILTER (WHERE b.delay BETWEEN 31  AND 60),
+            COUNT(*) FILTER (WHERE b.delay BETWEEN 61  AND 120),
+            COUNT(*) FILTER (WHERE b.delay > 120),
+            s.status_counts,
+            %(now)s
+        FROM board b
+        JOIN statuses s USING (airline, city)
+        GROUP BY b.airline, b.city, s.status_counts
+        ON CONFLICT (scheduled_date, source_airport, data_source, type, airline, city)
+    """ + _rollup_upsert_clause("origin_route_daily", ROUTE_ROLLUP_COLUMNS), params)
+
+    cursor.execute("""
+        DELETE FROM origin_route_daily r
+        WHERE r.scheduled_date = %(date)s AND r.type = %(type)s
+          AND r.source_airport = %(airport)s AND r.data_source = %(source)s
+          AND NOT EXISTS (
+              SELECT 1
+              FROM origin_flights f
+              WHERE f.scheduled_date = r.scheduled_date AND f.type = r.type
+                AND f.source_airport = r.source_airport AND f.data_source = r.data_source
+                AND LEFT(f.flight_number, 2) = r.airline
+                AND COALESCE(f.city, '')     = r.city
+          )
+    """, params)
+
+    cursor.execute("""
+        WITH board AS (
+            SELECT EXTRACT(HOUR FROM st_at AT TIME ZONE 'Asia/Karachi')::int AS sched_hour,
+                   status,
+                   CASE WHEN status IN ('Cancelled', 'Dropped') THEN NULL
+                        ELSE delay_minutes END                            AS delay
+            FROM origin_flights
+            WHERE scheduled_date = %(date)s AND type = %(type)s
+              AND source_airport = %(airport)s AND data_source = %(source)s
+        )
+        INSERT INTO origin_airport_hourly (
+            scheduled_date, source_airport, data_source, type, sched_hour,
+            flights, cancelled, dropped, on_time, delayed,
+            delay_samples, delay_total_min, delay_max_min,
+            refreshed_at
+        )
+        SELECT
+            %(date)s, %(airport)s, %(source)s, %(type)s, sched_hour,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE status = 'Cancelled'),
+            COUNT(*) FILTER (WHERE status = 'Dropped'),
+            COUNT(*) FILTER (WHERE delay <= %(on_time)s),
+            COUNT(*) FILTER (WHERE delay >  %(on_time)s),
+            COUNT(delay),
+            COALESCE(SUM(delay), 0),
+            MAX(delay),
+            %(now)s
+        FROM board
+        WHERE sched_hour IS NOT NULL
+        GROUP BY sched_hour
+        ON CONFLICT (scheduled_date, source_airport, data_source, type, sched_hour)
+    """ + _rollup_upsert_clause("origin_airport_hourly", HOURLY_ROLLUP_COLUMNS), params)
+
+    cursor.execute("""
+        DELETE FROM origin_airport_hourly h
+        WHERE h.scheduled_date = %(date)s AND h.type = %(type)s
+          AND h.source_airport = %(airport)s AND h.data_source = %(source)s
+          AND NOT EXISTS (
+              SELECT 1
+              FROM origin_flights f
+              WHERE f.scheduled_date = h.scheduled_date AND f.type = h.type
+                AND f.source_airport = h.source_airport AND f.data_source = h.data_source
+                AND EXTRACT(HOUR FROM f.st_at AT TIME ZONE 'Asia/Karachi') = h.sched_hour
+          )
+    """, params)
+
+
 # ==============================================================================
 #   HOUSEKEEPING
 # ==============================================================================
@@ -416,6 +906,10 @@ def cleanup_old_data(cursor) -> None:
         DELETE FROM origin_flights
         WHERE scheduled_date < (CURRENT_DATE - INTERVAL '7 days')
     """)
+    cursor.execute("""
+        DELETE FROM origin_board_status
+        WHERE scheduled_date < (CURRENT_DATE - INTERVAL '7 days')
+    """)
     log("  [CLEANUP] Deleted records older than 7 days")
 
 
@@ -423,7 +917,36 @@ def cleanup_old_data(cursor) -> None:
 #   MAIN
 # ==============================================================================
 
-def main() -> None:
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, in MB (None off Unix)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def log_memory(label: str) -> None:
+    peak = peak_rss_mb()
+    if peak is not None:
+        log(f"[MEM] Peak RSS {label}: {peak:.1f} MB")
+
+
+def log_cache_stats(cache_stats: dict) -> None:
+    """Per-airport HTTP cache hit rate for this run."""
+    log("\n[CACHE] Hit rate per airport:")
+    total_hits = total_boards = 0
+    for airport in WATCH_AIRPORTS:
+        hits, boards = cache_stats.get(airport, (0, 0))
+        total_hits   += hits
+        total_boards += boards
+        pct = 100 * hits / boards if boards else 0
+        log(f"  {airport:<12} {hits:2d}/{boards:<2d} boards ({pct:3.0f}%)")
+    pct = 100 * total_hits / total_boards if total_boards else 0
+    log(f"  {'All':<12} {total_hits:2d}/{total_boards:<2d} boards ({pct:3.0f}%)")
+
+
+def main(profile: bool = False) -> None:
 
     # --- Connect ---
     try:
@@ -436,7 +959,8 @@ def main() -> None:
         log(f"❌ DB connection failed: {e}")
         raise
 
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor   = conn.cursor(cursor_factory=RealDictCursor)
+    profiler = profiling.start_profiler(profile, "origin_scraper", log)
 
     try:
         now = datetime.datetime.now()
@@ -446,31 +970,68 @@ def main() -> None:
         ]
 
         # ---- PHASE 1: Fetch all data concurrently ----
-        all_results = fetch_all(dates)
+        http_cache = load_http_cache(HTTP_CACHE_PATH)
+        with profiler.phase("fetch"):
+            all_results = fetch_all(dates, http_cache)
+        log_memory("after fetch")
 
         # ---- PHASE 2: Write all results sequentially ----
         log("[WRITE] Processing and writing results to DB...")
 
-        total_changes = 0
-
-        for date_str, flight_type, airport, raw_flights in all_results:
-            log(f"\n--- {flight_type:<11} | {airport:<12} | {date_str} ---")
-
-            if not raw_flights:
-                log("  Skipped — no data returned")
-                continue
-
-            try:
-                changed = process_batch(cursor, date_str, flight_type, airport, raw_flights)
-                conn.commit()
-                total_changes += changed
-                log(f"  {changed} changes recorded — committed")
-            except Exception as e:
-                log(f"  [ERROR] Batch failed: {e} — rolling back")
-                conn.rollback()
-                continue  # Don't let one bad batch stop the rest
+        with profiler.phase("write"):
+            total_changes = 0
+            cache_stats   = {}   # airport → (hits, boards)
+            next_cache    = {}   # only this run's boards — older dates age out
+
+            # pop() so each batch's records are freed as soon as it is written
+            while all_results:
+                date_str, flight_type, airport, records, cache_status, cache_entry = all_results.pop()
+                url = board_url(date_str, flight_type, airport)
+                log(f"\n--- {flight_type:<11} | {airport:<12} | {date_str} ---")
+
+                hits, boards = cache_stats.get(airport, (0, 0))
+                cache_stats[airport] = (hits + (cache_status in CACHE_HITS), boards + 1)
+
+                if cache_status in CACHE_HITS:
+                    try:
+                        touch_board(
+                            cursor, date_str, flight_type, airport,
+                            datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                        )
+                        conn.commit()
+                        next_cache[url] = cache_entry
+                        log(f"  Cache hit ({cache_status}) — nothing to write")
+                    except Exception as e:
+                        log(f"  [ERROR] Freshness update failed: {e} — rolling back")
+                        conn.rollback()
+                    continue
+
+                # Empty boards are never cached: an empty body is most likely a
+                # failed fetch, and a cache hit on it next run would mark the
+                # board fresh in origin_board_status.
+                if not records:
+                    log("  Skipped — no data returned")
+                    continue
+
+                try:
+                    changed = process_batch(cursor, date_str, flight_type, airport, records)
+                    conn.commit()
+                    next_cache[url] = cache_entry   # only remembered once safely written
+                    total_changes += changed
+                    log(f"  {changed} changes recorded — committed")
+                except Exception as e:
+                    log(f"  [ERROR] Batch failed: {e} — rolling back")
+                    conn.rollback()
+                    continue  # Don't let one bad batch stop the rest
 
         log(f"\n[WRITE] Done. {total_changes} total changes across all batches.")
+        log_cache_stats(cache_stats)
+        log_memory("after write")
+
+        try:
+            save_http_cache(HTTP_CACHE_PATH, next_cache)
+        except OSError as e:
+            log(f"  [CACHE] Could not save {HTTP_CACHE_PATH}: {e}")
 
         # ---- Housekeeping ----
         update_scraper_status(cursor)
@@ -483,7 +1044,18 @@ def main() -> None:
         cursor.close()
         conn.close()
         log("DB connection closed.")
+        profiler.finish()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape all WATCH_AIRPORTS from the PAA API.")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="write CPU/memory profiles of the fetch and write phases (see profiling.py)",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(profile=args.profile)
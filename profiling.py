@@ -0,0 +1,194 @@
+"""
+profiling.py — opt-in CPU and memory profiling for scraper runs
+===============================================================
+Used by scraper.py and origin_scraper.py when run with --profile:
+
+    profiler = start_profiler(args.profile, "origin_scraper", log)
+    with profiler.phase("fetch"):
+        ...
+    profiler.finish()
+
+For every phase it writes into PROFILE_DIR/<script>-<timestamp>/:
+
+  <phase>.pstats      cProfile stats for the main thread
+                      (python -m pstats, snakeviz, ...)
+  <phase>.txt         top functions by cumulative time, human readable
+  <phase>.collapsed   stacks sampled from ALL threads (so the fetch workers
+                      show up too), folded format for flamegraph.pl /
+                      speedscope / inferno
+  <phase>.alloc.txt   peak traced memory and top allocation sites (tracemalloc)
+
+A phase can be entered many times (scraper.py enters fetch/write once per
+board); results accumulate per phase name.
+
+When profiling is off, start_profiler returns a no-op profiler whose phase()
+hands back a shared nullcontext — no cProfile, sampler thread or tracemalloc
+is ever started.
+"""
+
+import os
+import re
+import sys
+import pstats
+import cProfile
+import datetime
+import threading
+import contextlib
+import tracemalloc
+from collections import Counter
+
+
+# ==============================================================================
+#   CONFIG
+# ==============================================================================
+
+# Where per-run profile directories are created
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# Seconds between stack samples (all threads)
+SAMPLE_INTERVAL = 0.005
+
+# Rows in the text reports
+TOP_FUNCTIONS = 40
+TOP_ALLOC_SITES = 30
+
+
+# ==============================================================================
+#   PROFILERS
+# ==============================================================================
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+class NullProfiler:
+    """Stand-in used when --profile is not given. Costs nothing."""
+
+    enabled = False
+
+    def phase(self, name: str):
+        return _NULL_PHASE
+
+    def finish(self) -> None:
+        pass
+
+
+class RunProfiler:
+    """
+    cProfile (main thread) + a stack sampler (all threads) + tracemalloc,
+    bracketed by named phases.
+    """
+
+    enabled = True
+
+    def __init__(self, out_dir: str, log):
+        self.out_dir  = out_dir
+        self._log     = log
+        self._current = None                 # phase the sampler attributes samples to
+
+        self._cpu     = {}                   # phase → cProfile.Profile
+        self._stacks  = {}                   # phase → Counter(folded stack → samples)
+        self._allocs  = {}                   # phase → Counter(site → bytes)
+        self._counts  = {}                   # phase → Counter(site → blocks)
+        self._peaks   = {}                   # phase → peak traced bytes
+
+        os.makedirs(out_dir, exist_ok=True)
+        tracemalloc.start()
+
+        self._stop    = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    # --------------------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        cpu = self._cpu.setdefault(name, cProfile.Profile())
+        self._stacks.setdefault(name, Counter())
+
+        tracemalloc.reset_peak()
+        before = self._snapshot()
+
+        self._current = name
+        cpu.enable()
+        try:
+            yield
+        finally:
+            cpu.disable()
+            self._current = None
+
+            _, peak = tracemalloc.get_traced_memory()
+            self._peaks[name] = max(self._peaks.get(name, 0), peak)
+
+            sizes  = self._allocs.setdefault(name, Counter())
+            counts = self._counts.setdefault(name, Counter())
+            for stat in self._snapshot().compare_to(before, "lineno"):
+                if stat.size_diff > 0:
+                    site = str(stat.traceback)
+                    sizes[site]  += stat.size_diff
+                    counts[site] += stat.count_diff
+
+    def _snapshot(self):
+        """tracemalloc snapshot without the profiler's own bookkeeping."""
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def _sample_loop(self) -> None:
+        """Fold the stack of every other thread into the current phase's counter."""
+        me = threading.get_ident()
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            phase = self._current
+            if phase is None:
+                continue
+            # Pool workers are "ThreadPoolExecutor-0_3" — merge them into one root
+            names = {t.ident: re.sub(r"_\d+$", "", t.name) for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stack.reverse()
+                self._stacks[phase][";".join(stack)] += 1
+
+    # --------------------------------------------------------------------------
+
+    def finish(self) -> None:
+        """Stop sampling and write every phase's artifacts."""
+        self._stop.set()
+        self._sampler.join()
+        tracemalloc.stop()
+
+        for name, cpu in self._cpu.items():
+            base = os.path.join(self.out_dir, name)
+
+            cpu.dump_stats(base + ".pstats")
+            with open(base + ".txt", "w") as f:
+                pstats.Stats(cpu, stream=f).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+            with open(base + ".collapsed", "w") as f:
+                for stack, samples in self._stacks[name].most_common():
+                    f.write(f"{stack} {samples}\n")
+
+            with open(base + ".alloc.txt", "w") as f:
+                f.write(f"Peak traced memory: {self._peaks.get(name, 0) / (1024 * 1024):.1f} MB\n\n")
+                f.write(f"Top {TOP_ALLOC_SITES} allocation sites (net growth during phase):\n")
+                counts = self._counts.get(name, Counter())
+                for site, size in self._allocs.get(name, Counter()).most_common(TOP_ALLOC_SITES):
+                    f.write(f"{size / 1024:10.1f} KiB  {counts[site]:8d} blocks  {site}\n")
+
+        self._log(f"[PROFILE] Wrote {', '.join(self._cpu)} profiles to {self.out_dir}/")
+
+
+def start_profiler(enabled: bool, script_name: str, log):
+    """Return a RunProfiler writing to a fresh run directory, or a NullProfiler."""
+    if not enabled:
+        return NullProfiler()
+    run_id  = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    out_dir = os.path.join(PROFILE_DIR, f"{script_name}-{run_id}")
+    log(f"[PROFILE] Profiling enabled — artifacts go to {out_dir}/")
+    return RunProfiler(out_dir, log)
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+query_audit.py — EXPLAIN audit for the scraper and frontend hot queries
+=======================================================================
+Runs EXPLAIN (ANALYZE, BUFFERS) for every query in HOT_QUERIES against the
+target DB and flags:
+
+  - SEQ SCAN : a sequential scan that reads more than --seq-scan-min-rows rows
+               (small tables are fine to seq scan; big ones mean a missing index)
+  - GROWTH   : shared buffers touched grew more than --growth-tolerance × since
+               the saved baseline, i.e. the plan gets worse as data grows
+  - PLAN     : the plan shape changed since the baseline (informational)
+
+Each query mirrors the SQL actually sent by scraper.py, origin_scraper.py,
+docs/script.js and docs/flight_detail.js — keep them in sync when those change.
+Parameters are sampled from the newest rows so the plans reflect real data.
+
+Usage:
+  python query_audit.py                    # audit, compare against baseline if present
+  python query_audit.py --save-baseline    # record the current numbers as the baseline
+  python query_audit.py --only frontend_board --verbose
+
+Exits 1 if anything was flagged (handy in CI after applying migrations).
+Indexes for these queries live in migrations/003_hot_query_indexes.sql.
+"""
+
+import os
+import sys
+import json
+import argparse
+import datetime
+import psycopg2
+
+
+# ==============================================================================
+#   CONFIG
+# ==============================================================================
+
+# Baseline numbers from a previous audit of the same DB
+BASELINE_PATH = "query_audit_baseline.json"
+
+# Seq scans reading fewer rows than this are not flagged
+SEQ_SCAN_MIN_ROWS = 1000
+
+# Flag a query when its buffer count grows by more than this factor
+GROWTH_TOLERANCE = 2.0
+
+# Must match TERMINAL_STATUSES in both scrapers
+TERMINAL_STATUSES = ("Dropped", "Cancelled", "Landed", "Departed")
+
+# DB credentials from environment variables — never hardcoded.
+# DB_SSLMODE lets the audit run against a local Postgres without SSL.
+DB_HOST     = os.environ.get("DB_HOST")
+DB_NAME     = os.environ.get("DB_NAME")
+DB_USER     = os.environ.get("DB_USER")
+DB_PASSWORD = os.environ.get("DB_PASSWORD")
+DB_PORT     = int(os.environ.get("DB_PORT", 5432))
+DB_SSLMODE  = os.environ.get("DB_SSLMODE", "require")
+
+
+# ==============================================================================
+#   LOGGING
+# ==============================================================================
+
+def log(msg: str) -> None:
+    """Timestamped stdout log."""
+    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}", flush=True)
+
+
+# ==============================================================================
+#   HOT QUERIES
+#   name     → unique key (also used in the baseline file)
+#   source   → where the query is issued
+#   sample   → which sampled row provides the parameters ("origin" | "flights")
+#   sql      → the query, exactly as issued
+#   params   → function(sample) → query parameters
+# ==============================================================================
+
+HOT_QUERIES = [
+    {
+        "name":   "origin_key_lookup",
+        "source": "origin_scraper.py process_batch — once per flight",
+        "sample": "origin",
+        "sql": """
+            SELECT city, status, st, et
+            FROM origin_flights
+            WHERE flight_number  = %(flight_number)s
+              AND scheduled_date = %(scheduled_date)s
+              AND type           = %(type)s
+              AND source_airport = %(source_airport)s
+              AND data_source    = %(data_source)s
+        """,
+        "params": lambda s: s,
+    },
+    {
+        "name":   "origin_drop_check",
+        "source": "origin_scraper.py mark_dropped_flights — once per board",
+        "sample": "origin",
+        "sql": """
+            SELECT flight_number
+            FROM origin_flights
+            WHERE scheduled_date  = %s
+              AND type            = %s
+              AND source_airport  = %s
+              AND data_source     = %s
+              AND flight_number  != ALL(%s)
+              AND (status IS NULL OR status != ALL(%s))
+        """,
+        "params": lambda s: (
+            s["scheduled_date"], s["type"], s["source_airport"], s["data_source"],
+            s["board_flights"], list(TERMINAL_STATUSES),
+        ),
+    },
+    {
+        "name":   "flights_key_lookup",
+        "source": "scraper.py main loop — once per flight",
+        "sample": "flights",
+        "sql": """
+            SELECT city, status, st, et
+            FROM flights
+            WHERE flight_number = %(flight_number)s
+              AND scheduled_date = %(scheduled_date)s
+              AND type = %(type)s
+        """,
+        "params": lambda s: s,
+    },
+    {
+        "name":   "flights_drop_check",
+        "source": "scraper.py mark_dropped_flights — once per board",
+        "sample": "flights",
+        "sql": """
+            SELECT flight_number
+            FROM flights
+            WHERE scheduled_date = %s
+              AND type = %s
+              AND flight_number != ALL(%s)
+              AND (status IS NULL OR status != ALL(%s))
+        """,
+        "params": lambda s: (
+            s["scheduled_date"], s["type"], s["board_flights"], list(TERMINAL_STATUSES),
+        ),
+    },
+    {
+        "name":   "stale_airports",
+        "source": "notes/REFERENCE_QUERIES.txt — scraper health",
+        "sample": None,
+        "sql": """
+            SELECT source_airport, data_source, MAX(last_checked) AS last_seen
+            FROM origin_board_status
+            WHERE scheduled_date = CURRENT_DATE
+            GROUP BY source_airport, data_source
+            HAVING MAX(last_checked) < NOW() - INTERVAL '20 minutes'
+            ORDER BY last_seen
+        """,
+        "params": lambda s: None,
+    },
+    {
+        "name":   "frontend_board",
+        "source": "docs/script.js — date + type + nature filter",
+        "sample": "flights",
+        "sql": """
+            SELECT *
+            FROM flights
+            WHERE scheduled_date = %(scheduled_date)s
+              AND type           = %(type)s
+              AND nature         = %(nature)s
+            ORDER BY st_at ASC NULLS LAST
+        """,
+        "params": lambda s: s,
+    },
+    {
+        "name":   "frontend_search",
+        "source": "docs/script.js — flight number search (ilike)",
+        "sample": "flights",
+        "sql": """
+            SELECT *
+            FROM flights
+            WHERE scheduled_date = %(scheduled_date)s
+              AND flight_number ILIKE %(pattern)s
+            ORDER BY st_at ASC NULLS LAST
+        """,
+        "params": lambda s: {**s, "pattern": f"%{s['flight_number'][:4]}%"},
+    },
+    {
+        "name":   "frontend_freshness",
+        "source": "docs/flight_detail.js — board last checked",
+        "sample": "flights",
+        "sql": """
+            SELECT last_checked
+            FROM board_status
+            WHERE scheduled_date = %(scheduled_date)s
+              AND type           = %(type)s
+        """,
+        "params": lambda s: s,
+    },
+    {
+        "name":   "frontend_history",
+        "source": "docs/flight_detail.js — snapshot history per flight",
+        "sample": "flights",
+        "sql": """
+            SELECT *
+            FROM flight_snapshots
+            WHERE flight_number  = %(flight_number)s
+              AND scheduled_date = %(scheduled_date)s
+            ORDER BY scraped_at ASC
+        """,
+        "params": lambda s: s,
+    },
+]
+
+
+# ==============================================================================
+#   PARAMETER SAMPLING
+# ==============================================================================
+
+def sample_rows(cursor) -> dict:
+    """
+    Pick the newest row from each flights table (plus its board's flight
+    numbers for the drop checks). Missing tables/rows are simply left out.
+    """
+    samples = {}
+
+    cursor.execute("""
+        SELECT flight_number, scheduled_date, type, source_airport, data_source
+        FROM origin_flights
+        ORDER BY scheduled_date DESC
+        LIMIT 1
+    """)
+    row = cursor.fetchone()
+    if row:
+        s = dict(zip(("flight_number", "scheduled_date", "type", "source_airport", "data_source"), row))
+        cursor.execute("""
+            SELECT array_agg(flight_number)
+            FROM origin_flights
+            WHERE scheduled_date = %(scheduled_date)s AND type = %(type)s
+              AND source_airport = %(source_airport)s AND data_source = %(data_source)s
+        """, s)
+        s["board_flights"] = cursor.fetchone()[0]
+        samples["origin"] = s
+
+    cursor.execute("""
+        SELECT flight_number, scheduled_date, type, nature
+        FROM flights
+        ORDER BY scheduled_date DESC
+        LIMIT 1
+    """)
+    row = cursor.fetchone()
+    if row:
+        s = dict(zip(("flight_number", "scheduled_date", "type", "nature"), row))
+        cursor.execute("""
+            SELECT array_agg(flight_number)
+            FROM flights
+            WHERE scheduled_date = %(scheduled_date)s AND type = %(type)s
+        """, s)
+        s["board_flights"] = cursor.fetchone()[0]
+        samples["flights"] = s
+
+    return samples
+
+
+# ==============================================================================
+#   EXPLAIN
+# ==============================================================================
+
+def walk(node: dict):
+    """Yield every node of an EXPLAIN JSON plan tree, depth first."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def explain(cursor, query: dict, sample: dict | None) -> dict:
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) for one hot query and summarise the plan.
+    ANALYZE executes the query, so it runs in a transaction that is rolled back.
+    """
+    cursor.execute(
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query["sql"],
+        query["params"](sample),
+    )
+    result = cursor.fetchone()[0][0]
+    cursor.connection.rollback()
+
+    plan  = result["Plan"]
+    nodes = list(walk(plan))
+
+    seq_scans = []
+    for node in nodes:
+        if node["Node Type"] != "Seq Scan":
+            continue
+        loops   = node.get("Actual Loops", 1)
+        scanned = (node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)) * loops
+        seq_scans.append((node.get("Relation Name"), scanned))
+
+    return {
+        "exec_ms":    round(result["Execution Time"], 3),
+        "plan_ms":    round(result["Planning Time"], 3),
+        "buffers":    plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+        "rows":       plan.get("Actual Rows", 0),
+        "node_types": [n["Node Type"] for n in nodes],
+        "relations":  sorted({n["Relation Name"] for n in nodes if "Relation Name" in n}),
+        "seq_scans":  seq_scans,
+        "plan":       plan,
+    }
+
+
+def relation_rows(cursor, relations: list[str]) -> dict:
+    """Planner row estimates per table — used to put growth in context."""
+    if not relations:
+        return {}
+    cursor.execute("""
+        SELECT relname, reltuples::bigint
+        FROM pg_class
+        WHERE relname = ANY(%s) AND relkind IN ('r', 'p')
+    """, (relations,))
+    return dict(cursor.fetchall())
+
+
+def format_plan(node: dict, depth: int = 0) -> list[str]:
+    """Compact one-line-per-node rendering of a plan tree for --verbose."""
+    label = node["Node Type"]
+    if "Index Name" in node:
+        label += f" using {node['Index Name']}"
+    if "Relation Name" in node:
+        label += f" on {node['Relation Name']}"
+    line = (
+        f"{'  ' * depth}-> {label}"
+        f"  (rows={node.get('Actual Rows', 0)} loops={node.get('Actual Loops', 1)}"
+        f" time={node.get('Actual Total Time', 0):.3f}ms)"
+    )
+    lines = [line]
+    for child in node.get("Plans", []):
+        lines.extend(format_plan(child, depth + 1))
+    return lines
+
+
+# ==============================================================================
+#   CHECKS
+# ==============================================================================
+
+def check(stats: dict, baseline: dict | None, seq_scan_min_rows: int, growth_tolerance: float) -> list[str]:
+    """Return human-readable flags for one query (empty list = healthy)."""
+    flags = []
+
+    for relation, scanned in stats["seq_scans"]:
+        if scanned >= seq_scan_min_rows:
+            flags.append(f"SEQ SCAN on {relation} read {scanned} rows")
+
+    if baseline:
+        base_buffers = max(baseline["buffers"], 1)
+        growth       = stats["buffers"] / base_buffers
+        if growth > growth_tolerance:
+            data_growth = ", ".join(
+                f"{rel} {baseline['rel_rows'].get(rel, 0)}→{rows} rows"
+                for rel, rows in stats["rel_rows"].items()
+            )
+            flags.append(
+                f"GROWTH buffers {baseline['buffers']}→{stats['buffers']} "
+                f"({growth:.1f}×; {data_growth})"
+            )
+        if baseline["node_types"] != stats["node_types"]:
+            flags.append(
+                f"PLAN changed: {' > '.join(baseline['node_types'])}  →  {' > '.join(stats['node_types'])}"
+            )
+
+    return flags
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: dict) -> None:
+    recorded_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    data = {
+        name: {
+            "buffers":     stats["buffers"],
+            "exec_ms":     stats["exec_ms"],
+            "node_types":  stats["node_types"],
+            "rel_rows":    stats["rel_rows"],
+            "recorded_at": recorded_at,
+        }
+        for name, stats in results.items()
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    log(f"Baseline saved to {path} ({len(data)} queries)")
+
+
+# ==============================================================================
+#   MAIN
+# ==============================================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="EXPLAIN audit for the hot queries.")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help=f"baseline file to compare against (default: {BASELINE_PATH})")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write this run's numbers as the new baseline")
+    parser.add_argument("--seq-scan-min-rows", type=int, default=SEQ_SCAN_MIN_ROWS,
+                        help=f"ignore seq scans reading fewer rows (default: {SEQ_SCAN_MIN_ROWS})")
+    parser.add_argument("--growth-tolerance", type=float, default=GROWTH_TOLERANCE,
+                        help=f"flag buffer growth above this factor (default: {GROWTH_TOLERANCE})")
+    parser.add_argument("--only", action="append", metavar="NAME",
+                        help="audit only this query (repeatable)")
+    parser.add_argument("--verbose", action="store_true", help="print each plan tree")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    queries = [q for q in HOT_QUERIES if not args.only or q["name"] in args.only]
+    if not queries:
+        log(f"❌ No hot query matches {args.only}. Known: {[q['name'] for q in HOT_QUERIES]}")
+        return 2
+
+    try:
+        conn = psycopg2.connect(
+            host=DB_HOST, dbname=DB_NAME, user=DB_USER,
+            password=DB_PASSWORD, port=DB_PORT, sslmode=DB_SSLMODE
+        )
+        log("✅ DB connected")
+    except Exception as e:
+        log(f"❌ DB connection failed: {e}")
+        raise
+
+    cursor = conn.cursor()
+
+    try:
+        samples  = sample_rows(cursor)
+        baseline = load_baseline(args.baseline)
+        if baseline:
+            log(f"Comparing against baseline {args.baseline}")
+        else:
+            log("No baseline yet — growth checks skipped (use --save-baseline)")
+
+        results = {}
+        flagged = 0
+
+        for query in queries:
+            sample = samples.get(query["sample"]) if query["sample"] else None
+            if query["sample"] and sample is None:
+                log(f"\n--- {query['name']} --- SKIPPED (no rows to sample from)")
+                continue
+
+            try:
+                stats = explain(cursor, query, sample)
+            except psycopg2.Error as e:
+                conn.rollback()
+                log(f"\n--- {query['name']} --- [ERROR] {e.pgerror or e}")
+                flagged += 1
+                continue
+
+            stats["rel_rows"] = relation_rows(cursor, stats["relations"])
+            results[query["name"]] = stats
+
+            flags = check(
+                stats, baseline.get(query["name"]),
+                args.seq_scan_min_rows, args.growth_tolerance,
+            )
+
+            log(f"\n--- {query['name']} --- {query['source']}")
+            log(f"  {stats['exec_ms']:8.3f} ms exec | {stats['plan_ms']:7.3f} ms plan | "
+                f"{stats['buffers']:6d} buffers | {stats['rows']} rows")
+            if args.verbose:
+                for line in format_plan(stats["plan"]):
+                    log(f"    {line}")
+            for flag in flags:
+                log(f"  [FLAG] {flag}")
+            if any(not flag.startswith("PLAN") for flag in flags):
+                flagged += 1
+
+        if args.save_baseline:
+            save_baseline(args.baseline, results)
+
+        if flagged:
+            log(f"\n❌ {flagged} of {len(queries)} hot queries flagged")
+            return 1
+
+        log(f"\n✅ All {len(results)} hot queries look healthy")
+        return 0
+
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+read_api.py — Caching read API in front of the flights tables
+=============================================================
+Serves the queries docs/script.js and docs/flight_detail.js otherwise send
+straight to Postgres, from an in-memory cache that is only refilled after a
+scraper run completes. DB read load is then bounded by scrape frequency, not
+by visitor count.
+
+Endpoints (GET, JSON rows shaped like the PostgREST responses they replace):
+
+  /flights?date=YYYY-MM-DD[&q=PK30][&type=Arrival][&nature=Domestic]
+        board by date / flight number search              (docs/script.js)
+  /history?flight=PK300&date=YYYY-MM-DD
+        snapshot history of one flight                    (docs/flight_detail.js)
+  /freshness?date=YYYY-MM-DD&type=Arrival
+        when that board was last checked, or null         (docs/flight_detail.js)
+  /health
+        cache generation and size, never cached
+
+Caching:
+  - responses are kept in an LRU of CACHE_MAX_ENTRIES, each for at most CACHE_TTL
+  - the cache generation is the newest last_run in scraper_status /
+    origin_scraper_status, polled at most every GENERATION_POLL seconds;
+    when it moves the whole cache is dropped
+  - concurrent misses for the same key share one DB query
+  - every response carries an ETag (hash of the body); If-None-Match → 304,
+    so an unchanged board costs browsers no transfer even across scrapes
+
+Point the pages at it by setting READ_API in docs/script.js and
+docs/flight_detail.js; left empty they keep querying Supabase directly.
+
+Usage:
+  python read_api.py                       # 0.0.0.0:8080
+  python read_api.py --port 9000 --cors-origin https://abnaeem0.github.io
+"""
+
+import os
+import sys
+import json
+import time
+import decimal
+import hashlib
+import argparse
+import datetime
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import RealDictCursor
+
+
+# ==============================================================================
+#   CONFIG
+# ==============================================================================
+
+# Responses kept in memory (LRU) and their maximum age in seconds.
+# The TTL is only a backstop — normally a scraper run invalidates first.
+CACHE_MAX_ENTRIES = 2000
+CACHE_TTL         = 15 * 60
+
+# Seconds between checks of the scrapers' last_run timestamps
+GENERATION_POLL = 10
+
+# DB connections shared by the request threads
+POOL_MIN = 1
+POOL_MAX = 8
+
+# Queries slower than this are cancelled (milliseconds)
+STATEMENT_TIMEOUT_MS = 5000
+
+# Only board types / natures the pages offer
+FLIGHT_TYPES   = ("Arrival", "Departure")
+FLIGHT_NATURES = ("International", "Domestic")
+
+# Browser-side: always revalidate, which the ETag makes cheap
+CLIENT_CACHE_CONTROL = "public, no-cache"
+
+LISTEN_HOST = os.environ.get("READ_API_HOST", "0.0.0.0")
+LISTEN_PORT = int(os.environ.get("READ_API_PORT", 8080))
+CORS_ORIGIN = os.environ.get("READ_API_CORS_ORIGIN", "*")
+
+# DB credentials from environment variables — never hardcoded
+DB_HOST     = os.environ.get("DB_HOST")
+DB_NAME     = os.environ.get("DB_NAME")
+DB_USER     = os.environ.get("DB_USER")
+DB_PASSWORD = os.environ.get("DB_PASSWORD")
+DB_PORT     = int(os.environ.get("DB_PORT", 5432))
+DB_SSLMODE  = os.environ.get("DB_SSLMODE", "require")
+
+
+# ==============================================================================
+#   LOGGING
+# ==============================================================================
+
+def log(msg: str) -> None:
+    """Timestamped stdout log."""
+    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {msg}", flush=True)
+
+
+# ==============================================================================
+#   DB
+# ==============================================================================
+
+class Database:
+    """
+    Thread-safe wrapper around a ThreadedConnectionPool. Callers block for a
+    free connection instead of getting PoolError when all POOL_MAX are busy.
+    """
+
+    def __init__(self):
+        self._pool  = ThreadedConnectionPool(
+            POOL_MIN, POOL_MAX,
+            host=DB_HOST, dbname=DB_NAME, user=DB_USER,
+            password=DB_PASSWORD, port=DB_PORT, sslmode=DB_SSLMODE,
+            # Read-only sessions; UTC so timestamps serialise like PostgREST's (+00:00)
+            options=(
+                f"-c statement_timeout={STATEMENT_TIMEOUT_MS} "
+                "-c default_transaction_read_only=on -c TimeZone=UTC"
+            ),
+        )
+        self._slots = threading.BoundedSemaphore(POOL_MAX)
+
+    def fetch(self, sql: str, params: tuple) -> list[dict]:
+        with self._slots:
+            conn = self._pool.getconn()
+            broken = False
+            try:
+                conn.autocommit = True
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(sql, params)
+                    return cursor.fetchall()
+            except psycopg2.OperationalError:
+                broken = True
+                raise
+            finally:
+                self._pool.putconn(conn, close=broken or conn.closed != 0)
+
+
+# ==============================================================================
+#   CACHE
+# ==============================================================================
+
+class ResponseCache:
+    """
+    LRU + TTL cache of encoded responses, scoped to a generation: the newest
+    scraper run. Entries from an older generation are never served.
+    """
+
+    def __init__(self, db: Database):
+        self._db         = db
+        self._lock       = threading.Lock()
+        self._entries    = OrderedDict()    # key → (body, etag, stored_at)
+        self._inflight   = {}               # key → Event, one DB query per key
+        self.generation  = None
+        self._checked_at = 0.0
+        self.hits        = 0
+        self.misses      = 0
+
+    def refresh_generation(self) -> None:
+        """Drop everything when a scraper has finished a run since the last poll."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < GENERATION_POLL:
+                return
+            self._checked_at = now
+
+        try:
+            rows = self._db.fetch("""
+                SELECT GREATEST(
+                    (SELECT MAX(last_run) FROM scraper_status),
+                    (SELECT MAX(last_run) FROM origin_scraper_status)
+                ) AS last_run
+            """, ())
+        except psycopg2.Error as e:
+            # Keep serving what we have; the TTL still bounds staleness
+            log(f"[CACHE] Generation check failed: {e}")
+            return
+        generation = rows[0]["last_run"]
+
+        with self._lock:
+            if generation != self.generation:
+                if self.generation is not None:
+                    log(f"[CACHE] Scraper run at {generation} — dropped {len(self._entries)} responses")
+                self._entries.clear()
+                self.generation = generation
+
+    def get(self, key: tuple, load) -> tuple[bytes, str, bool]:
+        """
+        Return (body, etag, was_cached) for key, calling load() → bytes on a
+        miss. Concurrent misses for the same key wait for the first one.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and time.monotonic() - entry[2] < CACHE_TTL:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], entry[1], True
+
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    generation = self.generation
+                    done = self._inflight[key] = threading.Event()
+                    self.misses += 1
+                    break
+            waiting.wait()
+            # Loop: the leader stored the entry (or failed — then we try ourselves)
+
+        try:
+            body = load()
+            etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+            with self._lock:
+                # Don't store a result that raced with an invalidation
+                if self.generation == generation:
+                    self._entries[key] = (body, etag, time.monotonic())
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > CACHE_MAX_ENTRIES:
+                        self._entries.popitem(last=False)
+            return body, etag, False
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "generation": self.generation.isoformat() if self.generation else None,
+                "entries":    len(self._entries),
+                "hits":       self.hits,
+                "misses":     self.misses,
+            }
+
+
+# ==============================================================================
+#   ENDPOINTS
+#   Same SQL the pages send through PostgREST — keep in sync with the JS
+#   and with HOT_QUERIES in query_audit.py.
+# ==============================================================================
+
+class BadRequest(ValueError):
+    pass
+
+
+def _param(params: dict, name: str, required: bool = False, choices: tuple | None = None) -> str | None:
+    value = params.get(name, [""])[0].strip()
+    if not value:
+        if required:
+            raise BadRequest(f"missing '{name}'")
+        return None
+    if choices and value not in choices:
+        raise BadRequest(f"'{name}' must be one of {', '.join(choices)}")
+    return value
+
+
+def _date_param(params: dict) -> str:
+    value = _param(params, "date", required=True)
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise BadRequest("'date' must be YYYY-MM-DD")
+
+
+def _normalise_flight(value: str) -> str:
+    """Same as normaliseQuery() in docs/script.js — "pk 300" → "PK300"."""
+    return "".join(value.split()).replace("-", "").replace("_", "").upper()
+
+
+def flights_query(params: dict) -> tuple[tuple, str, tuple]:
+    date_str = _date_param(params)
+    query    = _param(params, "q")
+    query    = _normalise_flight(query) if query else None
+    f_type   = _param(params, "type", choices=FLIGHT_TYPES)
+    nature   = _param(params, "nature", choices=FLIGHT_NATURES)
+
+    sql, args = "SELECT * FROM flights WHERE scheduled_date = %s", [date_str]
+    if query:
+        sql  += " AND flight_number ILIKE %s"
+        args.append("%" + query.replace("\\", "\\\\").replace("%", "\\%") + "%")
+    if f_type:
+        sql += " AND type = %s"
+        args.append(f_type)
+    if nature:
+        sql += " AND nature = %s"
+        args.append(nature)
+    sql += " ORDER BY st_at ASC NULLS LAST"
+
+    return ("flights", date_str, query, f_type, nature), sql, tuple(args)
+
+
+def history_query(params: dict) -> tuple[tuple, str, tuple]:
+    flight   = _param(params, "flight", required=True)   # exact, as linked from the board
+    date_str = _date_param(params)
+    sql = """
+        SELECT * FROM flight_snapshots
+        WHERE flight_number = %s AND scheduled_date = %s
+        ORDER BY scraped_at ASC
+    """
+    return ("history", flight, date_str), sql, (flight, date_str)
+
+
+def freshness_query(params: dict) -> tuple[tuple, str, tuple]:
+    date_str = _date_param(params)
+    f_type   = _param(params, "type", required=True, choices=FLIGHT_TYPES)
+    sql = "SELECT last_checked FROM board_status WHERE scheduled_date = %s AND type = %s"
+    return ("freshness", date_str, f_type), sql, (date_str, f_type)
+
+
+# path → (builder, single row?) — single-row endpoints answer null when empty,
+# like supabase-js .maybeSingle()
+ENDPOINTS = {
+    "/flights":   (flights_query,   False),
+    "/history":   (history_query,   False),
+    "/freshness": (freshness_query, True),
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    raise TypeError(f"Not JSON serialisable: {type(value).__name__}")
+
+
+def encode(rows: list[dict], single: bool) -> bytes:
+    payload = (rows[0] if rows else None) if single else rows
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+
+
+# ==============================================================================
+#   HTTP
+# ==============================================================================
+
+class ReadApiHandler(BaseHTTPRequestHandler):
+    server_version = "flights-read-api/1"
+
+    # Set in main()
+    db:    Database      = None
+    cache: ResponseCache = None
+
+    def do_OPTIONS(self) -> None:
+        self.send_response(204)
+        self._cors_headers()
+        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "If-None-Match")
+        self.send_header("Access-Control-Max-Age", "86400")
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        url    = urlsplit(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == "/health":
+            self._send(200, json.dumps(self.cache.stats()).encode(), cache_control="no-store")
+            return
+
+        endpoint = ENDPOINTS.get(url.path)
+        if endpoint is None:
+            self._send_error(404, "not found")
+            return
+        build, single = endpoint
+
+        try:
+            key, sql, args = build(params)
+            self.cache.refresh_generation()
+            body, etag, cached = self.cache.get(key, lambda: encode(self.db.fetch(sql, args), single))
+        except BadRequest as e:
+            self._send_error(400, str(e))
+            return
+        except psycopg2.Error as e:
+            log(f"[ERROR] {url.path}: {e}")
+            self._send_error(503, "database unavailable")
+            return
+
+        headers = {"ETag": etag, "X-Cache": "HIT" if cached else "MISS"}
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self._send(304, b"", **headers)
+        else:
+            self._send(200, body, **headers)
+
+    # --------------------------------------------------------------------------
+
+    def _cors_headers(self) -> None:
+        self.send_header("Access-Control-Allow-Origin", CORS_ORIGIN)
+        self.send_header("Access-Control-Expose-Headers", "ETag, X-Cache")
+        if CORS_ORIGIN != "*":
+            self.send_header("Vary", "Origin")
+
+    def _send(self, status: int, body: bytes, cache_control: str = CLIENT_CACHE_CONTROL, **headers) -> None:
+        self.send_response(status)
+        self._cors_headers()
+        self.send_header("Cache-Control", cache_control)
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"error": message}).encode(), cache_control="no-store")
+
+    def log_message(self, format, *args) -> None:
+        # Per-request access logs are too noisy — errors are logged above
+        pass
+
+
+# ==============================================================================
+#   MAIN
+# ==============================================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Caching read API for the flight pages.")
+    parser.add_argument("--host", default=LISTEN_HOST, help=f"listen address (default: {LISTEN_HOST})")
+    parser.add_argument("--port", type=int, default=LISTEN_PORT, help=f"listen port (default: {LISTEN_PORT})")
+    parser.add_argument("--cors-origin", default=CORS_ORIGIN,
+                        help=f"Access-Control-Allow-Origin value (default: {CORS_ORIGIN})")
+    return parser.parse_args()
+
+
+def main() -> int:
+    global CORS_ORIGIN
+    args = parse_args()
+    CORS_ORIGIN = args.cors_origin
+
+    try:
+        db = Database()
+    except psycopg2.Error as e:
+        log(f"❌ DB connection failed: {e}")
+        return 1
+    log("✅ DB connected")
+
+    ReadApiHandler.db    = db
+    ReadApiHandler.cache = ResponseCache(db)
+
+    server = ThreadingHTTPServer((args.host, args.port), ReadApiHandler)
+    server.daemon_threads = True
+    log(f"[READ API] Listening on http://{args.host}:{args.port} (CORS origin: {CORS_ORIGIN})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 import os
+import re
+import argparse
 import datetime
 import requests
 import urllib3
 import psycopg2
 from psycopg2.extras import execute_values, RealDictCursor
 
+import profiling
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
@@ -19,6 +23,14 @@ PAA_TEMPLATE = "https://paaconnectapi.paa.gov.pk/api/flights/{date}/{type}/" + C
 # Statuses that mean a flight is finished — we don't snapshot these again
 TERMINAL_STATUSES = ("Dropped", "Cancelled", "Landed", "Departed")
 
+# PAA times (ST/ET/DateUpdated) are Pakistan local time — fixed +05:00, no DST
+PKT = datetime.timezone(datetime.timedelta(hours=5), "PKT")
+
+# A valid PAA clock time: 0-23 hours, two-digit minutes. Trailing text
+# ("14:35:00") is ignored. Must match paa_hhmm_minutes() in migrations/
+# so backfilled and scraped st_at / et_at agree.
+HHMM_PATTERN = re.compile(r"\s*([01]?[0-9]|2[0-3]):([0-5][0-9])", re.ASCII)
+
 # DB credentials come from environment variables (never hardcode these)
 DB_HOST     = os.environ.get("DB_HOST")
 DB_NAME     = os.environ.get("DB_NAME")
@@ -59,11 +71,60 @@ def fetch_flights(date_str, tag):
     return []
 
 
+def parse_schedule_time(date_str, hhmm):
+    """
+    Combine a scheduled date with a PAA "HH:MM" time into a PKT timestamp.
+    Returns None for blank or malformed times.
+    """
+    match = HHMM_PATTERN.match(hhmm) if isinstance(hhmm, str) else None
+    if not match:
+        return None
+    try:
+        day = datetime.date.fromisoformat(date_str)
+    except ValueError:
+        return None
+    return datetime.datetime.combine(day, datetime.time(int(match[1]), int(match[2])), tzinfo=PKT)
+
+
+def parse_schedule(date_str, st, et):
+    """
+    Parse ST/ET into (st_at, et_at, delay_minutes).
+    ET is placed on whichever day keeps it within 12 hours of ST, so
+    ST 23:50 / ET 00:20 counts as 30 minutes late rather than 23.5 hours early.
+    """
+    st_at = parse_schedule_time(date_str, st)
+    et_at = parse_schedule_time(date_str, et)
+
+    if st_at is None or et_at is None:
+        return st_at, et_at, None
+
+    gap = et_at - st_at
+    if gap < -datetime.timedelta(hours=12):
+        et_at += datetime.timedelta(days=1)
+    elif gap > datetime.timedelta(hours=12):
+        et_at -= datetime.timedelta(days=1)
+
+    return st_at, et_at, int((et_at - st_at).total_seconds() // 60)
+
+
+def parse_updated_at(value):
+    """Parse PAA's DateUpdated (ISO-ish, PKT when no offset is given)."""
+    if not value:
+        return None
+    try:
+        ts = datetime.datetime.fromisoformat(value.strip())
+    except (ValueError, AttributeError):
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=PKT)
+
+
 def flatten_flight(raw, tag, date_str, fetched_at):
     """
     Convert a raw PAA API flight dict into our DB-friendly flat dict.
     - Strips spaces from flight number so TK 571 becomes TK571
     - Captures Nature (International/Domestic) from the API
+    - Parses ST/ET/DateUpdated once into timestamps plus delay_minutes
+      (the raw ST/ET strings are still stored for display)
     Returns None if the flight has no flight number (unusable record).
     """
     flight_number = raw.get("FlightNumber")
@@ -71,6 +132,8 @@ def flatten_flight(raw, tag, date_str, fetched_at):
         log(f"  [WARN] Skipping record with no FlightNumber for {tag} {date_str}")
         return None
 
+    st_at, et_at, delay_minutes = parse_schedule(date_str, raw.get("ST"), raw.get("ET"))
+
     return {
         "flight_number":  flight_number.replace(" ", ""),
         "scheduled_date": date_str,
@@ -83,6 +146,10 @@ def flatten_flight(raw, tag, date_str, fetched_at):
         "last_checked":   fetched_at,
         "last_updated":   raw.get("DateUpdated"),
         "nature":         raw.get("Nature"),
+        "st_at":          st_at,
+        "et_at":          et_at,
+        "delay_minutes":  delay_minutes,
+        "last_updated_at": parse_updated_at(raw.get("DateUpdated")),
     }
 
 
@@ -185,6 +252,135 @@ def mark_dropped_flights(cursor, date_str, tag, seen_flight_numbers, fetched_at)
     ])
 
 
+# ==============================================================================
+#   PROCESS ONE BOARD (one date + type)
+# ==============================================================================
+
+def process_board(cursor, date_str, tag, raw_flights, fetched_at):
+    """
+    Write one fetched (date, type) board to the DB: upsert every flight,
+    snapshot the ones that changed, mark dropped flights and record board
+    freshness. The caller commits.
+
+    Returns the number of changes recorded.
+    """
+    seen_flight_numbers = set()
+    changed_count       = 0
+    snapshot_rows       = []
+
+    # --- Process each flight ---
+    for raw in raw_flights:
+        flat = flatten_flight(raw, tag, date_str, fetched_at)
+        if not flat:
+            continue
+
+        seen_flight_numbers.add(flat["flight_number"])
+
+        # Look up existing DB row for this flight
+        cursor.execute("""
+            SELECT city, status, st, et
+            FROM flights
+            WHERE flight_number = %(flight_number)s
+              AND scheduled_date = %(scheduled_date)s
+              AND type = %(type)s
+        """, flat)
+        existing = cursor.fetchone()
+
+        # Detect what (if anything) changed
+        is_changed, change_type = detect_change(existing, flat)
+
+        # --- Upsert into flights table ---
+        # Rows are only rewritten when something differs (the WHERE
+        # guard below) — unchanged flights produce no new row version.
+        # last_updated is only changed when meaningful fields change.
+        cursor.execute("""
+            INSERT INTO flights (
+                flight_number, scheduled_date, type, city, airline_logo,
+                status, ST, ET, last_checked, last_updated, nature,
+                st_at, et_at, delay_minutes, last_updated_at
+            ) VALUES (
+                %(flight_number)s, %(scheduled_date)s, %(type)s, %(city)s, %(airline_logo)s,
+                %(status)s, %(ST)s, %(ET)s, %(last_checked)s, %(last_updated)s, %(nature)s,
+                %(st_at)s, %(et_at)s, %(delay_minutes)s, %(last_updated_at)s
+            )
+            ON CONFLICT (flight_number, scheduled_date, type)
+            DO UPDATE SET
+                city          = EXCLUDED.city,
+                airline_logo  = EXCLUDED.airline_logo,
+                status        = EXCLUDED.status,
+                ST            = EXCLUDED.ST,
+                ET            = EXCLUDED.ET,
+                st_at         = EXCLUDED.st_at,
+                et_at         = EXCLUDED.et_at,
+                delay_minutes = EXCLUDED.delay_minutes,
+                last_checked  = EXCLUDED.last_checked,
+                nature        = EXCLUDED.nature,
+                last_updated  = CASE
+                    WHEN flights.status   IS DISTINCT FROM EXCLUDED.status
+                      OR flights.ST       IS DISTINCT FROM EXCLUDED.ST
+                      OR flights.ET       IS DISTINCT FROM EXCLUDED.ET
+                      OR flights.city     IS DISTINCT FROM EXCLUDED.city
+                    THEN EXCLUDED.last_updated
+                    ELSE flights.last_updated
+                END,
+                last_updated_at = CASE
+                    WHEN flights.status   IS DISTINCT FROM EXCLUDED.status
+                      OR flights.ST       IS DISTINCT FROM EXCLUDED.ST
+                      OR flights.ET       IS DISTINCT FROM EXCLUDED.ET
+                      OR flights.city     IS DISTINCT FROM EXCLUDED.city
+                    THEN EXCLUDED.last_updated_at
+                    ELSE flights.last_updated_at
+                END
+            WHERE (flights.city, flights.airline_logo, flights.status,
+                   flights.ST, flights.ET, flights.nature,
+                   flights.st_at, flights.et_at, flights.delay_minutes)
+                  IS DISTINCT FROM
+                  (EXCLUDED.city, EXCLUDED.airline_logo, EXCLUDED.status,
+                   EXCLUDED.ST, EXCLUDED.ET, EXCLUDED.nature,
+                   EXCLUDED.st_at, EXCLUDED.et_at, EXCLUDED.delay_minutes)
+        """, flat)
+
+        # --- Only snapshot when something actually changed ---
+        if is_changed:
+            changed_count += 1
+            snapshot_rows.append((
+                flat["flight_number"],
+                flat["scheduled_date"],
+                fetched_at,
+                True,
+                change_type,
+                flat["status"],
+                flat["ST"],
+                flat["ET"],
+                flat["city"],
+                flat["type"],
+                flat["airline_logo"],
+                flat["nature"],
+            ))
+
+    # --- Batch insert changed snapshots ---
+    if snapshot_rows:
+        try:
+            execute_values(cursor, """
+                INSERT INTO flight_snapshots (
+                    flight_number, scheduled_date, scraped_at, is_changed,
+                    change_type, status, ST, ET, city, type, airline_logo, nature
+                ) VALUES %s
+            """, snapshot_rows)
+        except Exception as e:
+            log(f"  [ERROR] Snapshot insert failed: {e}")
+            cursor.connection.rollback()
+            raise
+
+    # --- Check for silently dropped flights ---
+    mark_dropped_flights(cursor, date_str, tag, seen_flight_numbers, fetched_at)
+
+    # --- Board-level freshness (one row, not one per flight) ---
+    update_board_status(cursor, date_str, tag, fetched_at, len(seen_flight_numbers))
+
+    return changed_count
+
+
 # ==============================================================================
 #   SCRAPER STATUS (freshness timestamp for the frontend)
 # ==============================================================================
@@ -202,6 +398,21 @@ def update_scraper_status(cursor):
     """, (now_utc,))
 
 
+def update_board_status(cursor, date_str, tag, fetched_at, flight_count):
+    """
+    Record that one (date, type) board was checked. This replaces rewriting
+    last_checked on every flight row — the frontend reads this for
+    "Last checked X minutes ago" on the flight detail page.
+    """
+    cursor.execute("""
+        INSERT INTO board_status (scheduled_date, type, last_checked, flight_count)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (scheduled_date, type) DO UPDATE SET
+            last_checked = EXCLUDED.last_checked,
+            flight_count = EXCLUDED.flight_count
+    """, (date_str, tag, fetched_at, flight_count))
+
+
 # ==============================================================================
 #   CLEANUP (keeps DB lean — deletes data older than 2 months)
 # ==============================================================================
@@ -219,6 +430,10 @@ def cleanup_old_data(cursor):
         DELETE FROM flights
         WHERE scheduled_date < (CURRENT_DATE - INTERVAL '2 months')
     """)
+    cursor.execute("""
+        DELETE FROM board_status
+        WHERE scheduled_date < (CURRENT_DATE - INTERVAL '2 months')
+    """)
     log("  [CLEANUP] Old data deleted (>2 months)")
 
 
@@ -226,7 +441,7 @@ def cleanup_old_data(cursor):
 #   MAIN
 # ==============================================================================
 
-def main():
+def main(profile=False):
 
     # --- Connect to DB ---
     try:
@@ -239,7 +454,8 @@ def main():
         log(f"❌ DB connection failed: {e}")
         raise
 
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor   = conn.cursor(cursor_factory=RealDictCursor)
+    profiler = profiling.start_profiler(profile, "scraper", log)
 
     try:
         now = datetime.datetime.now()
@@ -258,102 +474,15 @@ def main():
                 fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
                 # --- Fetch from PAA API ---
-                raw_flights = fetch_flights(date_str, tag)
+                with profiler.phase("fetch"):
+                    raw_flights = fetch_flights(date_str, tag)
                 if not raw_flights:
                     continue  # Skip drop detection too — fetch may have failed
 
-                seen_flight_numbers = set()
-                changed_count       = 0
-                snapshot_rows       = []
-
-                # --- Process each flight ---
-                for raw in raw_flights:
-                    flat = flatten_flight(raw, tag, date_str, fetched_at)
-                    if not flat:
-                        continue
-
-                    seen_flight_numbers.add(flat["flight_number"])
-
-                    # Look up existing DB row for this flight
-                    cursor.execute("""
-                        SELECT city, status, st, et
-                        FROM flights
-                        WHERE flight_number = %(flight_number)s
-                          AND scheduled_date = %(scheduled_date)s
-                          AND type = %(type)s
-                    """, flat)
-                    existing = cursor.fetchone()
-
-                    # Detect what (if anything) changed
-                    is_changed, change_type = detect_change(existing, flat)
-
-                    # --- Upsert into flights table ---
-                    # Always update the flights table with the latest data.
-                    # last_updated is only changed when meaningful fields change.
-                    cursor.execute("""
-                        INSERT INTO flights (
-                            flight_number, scheduled_date, type, city, airline_logo,
-                            status, ST, ET, last_checked, last_updated, nature
-                        ) VALUES (
-                            %(flight_number)s, %(scheduled_date)s, %(type)s, %(city)s, %(airline_logo)s,
-                            %(status)s, %(ST)s, %(ET)s, %(last_checked)s, %(last_updated)s, %(nature)s
-                        )
-                        ON CONFLICT (flight_number, scheduled_date, type)
-                        DO UPDATE SET
-                            city          = EXCLUDED.city,
-                            airline_logo  = EXCLUDED.airline_logo,
-                            status        = EXCLUDED.status,
-                            ST            = EXCLUDED.ST,
-                            ET            = EXCLUDED.ET,
-                            last_checked  = EXCLUDED.last_checked,
-                            nature        = EXCLUDED.nature,
-                            last_updated  = CASE
-                                WHEN flights.status   IS DISTINCT FROM EXCLUDED.status
-                                  OR flights.ST       IS DISTINCT FROM EXCLUDED.ST
-                                  OR flights.ET       IS DISTINCT FROM EXCLUDED.ET
-                                  OR flights.city     IS DISTINCT FROM EXCLUDED.city
-                                THEN EXCLUDED.last_updated
-                                ELSE flights.last_updated
-                            END
-                    """, flat)
-
-                    # --- Only snapshot when something actually changed ---
-                    if is_changed:
-                        changed_count += 1
-                        snapshot_rows.append((
-                            flat["flight_number"],
-                            flat["scheduled_date"],
-                            fetched_at,
-                            True,
-                            change_type,
-                            flat["status"],
-                            flat["ST"],
-                            flat["ET"],
-                            flat["city"],
-                            flat["type"],
-                            flat["airline_logo"],
-                            flat["nature"],
-                        ))
-
-                # --- Batch insert changed snapshots ---
-                if snapshot_rows:
-                    try:
-                        execute_values(cursor, """
-                            INSERT INTO flight_snapshots (
-                                flight_number, scheduled_date, scraped_at, is_changed,
-                                change_type, status, ST, ET, city, type, airline_logo, nature
-                            ) VALUES %s
-                        """, snapshot_rows)
-                    except Exception as e:
-                        log(f"  [ERROR] Snapshot insert failed: {e}")
-                        conn.rollback()
-                        raise
-
-                # --- Check for silently dropped flights ---
-                mark_dropped_flights(cursor, date_str, tag, seen_flight_numbers, fetched_at)
-
-                log(f"  {changed_count} changes recorded")
-                conn.commit()
+                with profiler.phase("write"):
+                    changed_count = process_board(cursor, date_str, tag, raw_flights, fetched_at)
+                    log(f"  {changed_count} changes recorded")
+                    conn.commit()
 
         # --- Update freshness timestamp ---
         update_scraper_status(cursor)
@@ -368,7 +497,18 @@ def main():
         cursor.close()
         conn.close()
         log("DB connection closed.")
+        profiler.finish()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape Islamabad flights from the PAA API.")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="write CPU/memory profiles of the fetch and write phases (see profiling.py)",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(profile=args.profile)